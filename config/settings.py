@@ -119,3 +119,31 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Logging
+# https://docs.djangoproject.com/en/6.0/topics/logging/
+# FTP services log through the standard logging module. Only warnings and
+# errors are shown by default, so the hot paths do no log I/O; lower the
+# level to INFO for logins, transfers and connects, or DEBUG for the
+# per-command trace.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'ftp_client': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+        'ftp_server': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
@@ -1,5 +1,14 @@
+import logging
+import traceback
+
 from django.core.management.base import BaseCommand
 from ftp_client.services.ftp_core import FTPClient
+from ftp_client.services.async_connection import check_login_many
+
+# Section separators, built once
+SEP = "=" * 60
+RULE = "─" * 60
+
 
 class Command(BaseCommand):
     """
@@ -58,6 +67,14 @@ class Command(BaseCommand):
             default='guest@example.com',
             help='FTP password (default: guest@example.com)'
         )
+        
+        # Optional argument: run N login checks concurrently (asyncio)
+        parser.add_argument(
+            '--parallel',
+            type=int,
+            default=0,
+            help='Run N concurrent login checks over the comma-separated --host list (default: off)'
+        )
     
     def handle(self, *args, **options):
         """
@@ -67,135 +84,182 @@ class Command(BaseCommand):
             options: Dictionary of command-line arguments
                      e.g., {'host': 'ftp.gnu.org', 'user': 'anonymous'}
         """
+        # Bind the output helpers once - they are used on every line below
+        write = self.stdout.write
+        warn = self.style.WARNING
+        ok = self.style.SUCCESS
+        err = self.style.ERROR
+        info = self.style.HTTP_INFO
+        
+        # -v 2 shows every command and reply the FTP client exchanges
+        if options['verbosity'] > 1:
+            logging.getLogger('ftp_client').setLevel(logging.DEBUG)
+        
         # Extract arguments (with defaults from add_arguments)
         host = options['host']
         username = options['user']
         password = options['password']
         port = options['port']
         
+        if options['parallel'] > 0:
+            self.handle_parallel(host.split(','), port, username, password, options['parallel'])
+            return
+        
         # Print header
-        self.stdout.write("=" * 60)
-        self.stdout.write(self.style.HTTP_INFO("FTP CONNECTION TEST"))
-        self.stdout.write("=" * 60)
-        self.stdout.write(f"Host: {host}")
-        self.stdout.write(f"User: {username}")
-        self.stdout.write("=" * 60)
-        self.stdout.write("")
+        write(SEP)
+        write(info("FTP CONNECTION TEST"))
+        write(SEP)
+        write(f"Host: {host}")
+        write(f"User: {username}")
+        write(SEP)
+        write("")
         
-        # Create FTP client
-        client = FTPClient(host, port=port)
+        client = None
         
         try:
-            # STEP 1: Connect to server
-            self.stdout.write(self.style.WARNING("STEP 1: Connecting to server..."))
-            self.stdout.write("")
+            # STEP 1: Connect to server and log in
+            # (reuses a pooled, already logged-in connection when there is one)
+            write(warn("STEP 1: Connecting and logging in..."))
+            write("")
             
-            client.connect()
+            client = FTPClient.acquire(host, username, password, port=port)
+            login_success = client.logged_in
             
             # Success message
-            self.stdout.write("")
-            self.stdout.write(self.style.SUCCESS("Connection established!"))
-            self.stdout.write("")
-            
-            # STEP 2: Login
-            self.stdout.write(self.style.WARNING("STEP 2: Logging in..."))
-            self.stdout.write("")
-            
-            login_success = client.login(username, password)
-            
-            self.stdout.write("")
+            write("")
+            write(ok("Connection established!"))
+            write("")
             
             if login_success:
-                self.stdout.write(self.style.SUCCESS("✓ LOGIN SUCCESSFUL!"))
-                self.stdout.write("")
+                write(ok("✓ LOGIN SUCCESSFUL!"))
+                write("")
                 
                 # NEW: List files
                 try:
-                    self.stdout.write(self.style.WARNING("STEP 2.5: Listing files..."))
-                    self.stdout.write("")
+                    write(warn("STEP 2.5: Listing files..."))
+                    write("")
                     
                     listing = client.list_files()
                     
-                    self.stdout.write("")
-                    self.stdout.write(self.style.SUCCESS("✓ FILE LISTING RECEIVED:"))
-                    self.stdout.write("")
-                    self.stdout.write("─" * 60)
+                    write("")
+                    write(ok("✓ FILE LISTING RECEIVED:"))
+                    write("")
+                    write(RULE)
                     
                     # Print first 20 lines only (listings can be huge)
-                    lines = listing.split('\n')[:20]
-                    for line in lines:
-                        if line.strip():  # Skip empty lines
-                            self.stdout.write(line)
+                    # Split once, then write them all in a single call
+                    lines = listing.split('\n')
+                    n = len(lines)
+                    head = [line for line in lines[:20] if line.strip()]  # Skip empty lines
+                    write('\n'.join(head))
                     
-                    if len(listing.split('\n')) > 20:
-                        self.stdout.write("...")
-                        self.stdout.write(f"(+ {len(listing.split('\n')) - 20} more files)")
+                    if n > 20:
+                        write("...")
+                        write(f"(+ {n - 20} more files)")
                     
-                    self.stdout.write("─" * 60)
+                    write(RULE)
                     
                 except Exception as e:
-                    self.stdout.write("")
-                    self.stdout.write(self.style.ERROR(f"✗ LIST FAILED: {e}"))
-                    import traceback
-                    self.stdout.write(traceback.format_exc())
+                    write("")
+                    write(err(f"✗ LIST FAILED: {e}"))
+                    write(traceback.format_exc())
                     
                 try:
 
                     # Trying PWD
-                    self.stdout.write(self.style.WARNING("STEP 2.6: Getting current directory..."))
-                    self.stdout.write("")
+                    write(warn("STEP 2.6: Getting current directory..."))
+                    write("")
                     current_dir = client.pwd()
-                    self.stdout.write("")
-                    self.stdout.write(self.style.SUCCESS(f"✓ CURRENT DIRECTORY: {current_dir}"))
+                    write("")
+                    write(ok(f"✓ CURRENT DIRECTORY: {current_dir}"))
                 except Exception as e:
-                    self.stdout.write("")
-                    self.stdout.write(self.style.ERROR(f"✗ PWD FAILED: {e}"))
-                    import traceback
-                    self.stdout.write(traceback.format_exc())
+                    write("")
+                    write(err(f"✗ PWD FAILED: {e}"))
+                    write(traceback.format_exc())
 
                     
-            client.quit()
+            # Return the connection to the pool (falls back to QUIT if not logged in)
+            client.release()
+            client = None
             
-            self.stdout.write("")
-            self.stdout.write(self.style.SUCCESS("DISCONNECTED CLEANLY"))
+            write("")
+            write(ok("RELEASED CLEANLY"))
             
         except ConnectionRefusedError:
             # Server isn't running or wrong host/port
-            self.stdout.write("")
-            self.stdout.write(self.style.ERROR("CONNECTION REFUSED"))
-            self.stdout.write("")
-            self.stdout.write(f"Cannot connect to {host}:21")
-            self.stdout.write("Possible reasons:")
-            self.stdout.write("  - Server is down")
-            self.stdout.write("  - Firewall blocking connection")
-            self.stdout.write("  - Wrong hostname")
+            write("")
+            write(err("CONNECTION REFUSED"))
+            write("")
+            write(f"Cannot connect to {host}:21")
+            write("Possible reasons:")
+            write("  - Server is down")
+            write("  - Firewall blocking connection")
+            write("  - Wrong hostname")
             
         except TimeoutError:
             # Server didn't respond in time
-            self.stdout.write("")
-            self.stdout.write(self.style.ERROR("CONNECTION TIMEOUT"))
-            self.stdout.write("")
-            self.stdout.write(f"Server {host} didn't respond within 30 seconds")
-            self.stdout.write("Possible reasons:")
-            self.stdout.write("  - Server is slow/overloaded")
-            self.stdout.write("  - Network issues")
+            write("")
+            write(err("CONNECTION TIMEOUT"))
+            write("")
+            write(f"Server {host} didn't respond within 30 seconds")
+            write("Possible reasons:")
+            write("  - Server is slow/overloaded")
+            write("  - Network issues")
             
         except Exception as e:
             # Something else went wrong
-            self.stdout.write("")
-            self.stdout.write(self.style.ERROR(f"ERROR: {type(e).__name__}"))
-            self.stdout.write("")
-            self.stdout.write(str(e))
+            write("")
+            write(err(f"ERROR: {type(e).__name__}"))
+            write("")
+            write(str(e))
             
             # Print full traceback for debugging
-            import traceback
-            self.stdout.write("")
-            self.stdout.write("Full traceback:")
-            self.stdout.write(traceback.format_exc())
+            write("")
+            write("Full traceback:")
+            write(traceback.format_exc())
             
         finally:
+            # Something above failed - don't pool a connection in unknown state
+            if client is not None:
+                client.quit()
+            
             # Always print footer
-            self.stdout.write("")
-            self.stdout.write("=" * 60)
-            self.stdout.write("Test complete")
-            self.stdout.write("=" * 60)
\ No newline at end of file
+            write("")
+            write(SEP)
+            write("Test complete")
+            write(SEP)
+    
+    def handle_parallel(self, hosts, port, username, password, count):
+        """
+        Run `count` login checks at once, spread round-robin over `hosts`.
+        
+        Uses the asyncio connection, so all sessions run on one thread.
+        """
+        write = self.stdout.write
+        ok = self.style.SUCCESS
+        err = self.style.ERROR
+        info = self.style.HTTP_INFO
+        
+        targets = [hosts[i % len(hosts)] for i in range(count)]
+        
+        write(SEP)
+        write(info("FTP PARALLEL LOGIN TEST"))
+        write(SEP)
+        write(f"Hosts: {', '.join(hosts)}")
+        write(f"Sessions: {count}")
+        write(SEP)
+        
+        results = check_login_many(targets, port, username, password)
+        
+        for i, result in enumerate(results, 1):
+            if result['error']:
+                write(err(f"[{i}] {result['host']}: {result['error']}"))
+            elif result['logged_in']:
+                write(ok(f"[{i}] {result['host']}: {result['pwd']}"))
+            else:
+                write(err(f"[{i}] {result['host']}: login failed"))
+        
+        logged_in = sum(1 for r in results if r['logged_in'])
+        write(SEP)
+        write(f"{logged_in}/{count} sessions logged in")
+        write(SEP)
\ No newline at end of file
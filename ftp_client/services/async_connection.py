@@ -0,0 +1,175 @@
+import asyncio
+
+
+class FTPConnectionAsync:
+    """
+    asyncio version of FTPConnection.
+    
+    Same job - manage one TCP connection and read/write FTP lines - but
+    every wait is an await, so many control connections can share one
+    thread and one event loop instead of blocking each other.
+    """
+    
+    def __init__(self, host, port=21, timeout=30, is_control=True):
+        """
+        Initialize connection parameters (doesn't connect yet)
+        
+        Args:
+            host: Server address
+            port: FTP port
+            timeout: Connection timeout in seconds
+            is_control: True for control connection (expects welcome), False for data connection
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.is_control = is_control
+        self.reader = None
+        self.writer = None
+    
+    async def connect(self):
+        """
+        Open TCP connection to the FTP server.
+        
+        Returns:
+            str: Welcome message (for control connection) or empty string (for data connection)
+        """
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port),
+                timeout=self.timeout,
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"Connection to {self.host}:{self.port} timed out after {self.timeout} seconds."
+            )
+        
+        if self.is_control:
+            return await self._read_response()
+        
+        return ""
+    
+    async def _read_response(self):
+        """
+        Read one complete server reply (RFC 959 grammar).
+        
+        Single line "XXX text" ends the reply immediately; "XXX-text" opens a
+        multi-line reply that ends at the first line starting with "XXX ".
+        StreamReader keeps any bytes past the terminator for the next call.
+        
+        Returns:
+            str: Complete server response
+        """
+        lines = []
+        code = None
+        
+        while True:
+            try:
+                line = await asyncio.wait_for(self.reader.readuntil(b'\n'), timeout=self.timeout)
+            except asyncio.IncompleteReadError as e:
+                # Server closed the connection - return whatever we got
+                lines.append(e.partial)
+                break
+            
+            lines.append(line)
+            
+            if not line[:3].isdigit():
+                continue
+            
+            if code is None:
+                if line[3:4] == b'-':
+                    code = line[:3]
+                    continue
+                break
+            
+            if line[:3] == code and line[3:4] == b' ':
+                break
+        
+        return b''.join(lines).decode('utf-8', errors='ignore')
+    
+    async def send_command(self, command):
+        """
+        Send command to FTP server and get response.
+        
+        Args:
+            command: FTP command
+        
+        Returns:
+            str: Server's response
+        """
+        self.writer.write(f"{command}\r\n".encode('utf-8'))
+        await self.writer.drain()
+        return await self._read_response()
+    
+    async def close(self):
+        """Close the TCP connection."""
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+            self.writer = None
+            self.reader = None
+
+
+async def check_login(host, port=21, username='anonymous', password='guest@example.com'):
+    """
+    Connect, log in, ask for the working directory and QUIT - all async.
+    
+    Args:
+        host: FTP server address
+        port: FTP port
+        username: Login username
+        password: Login password
+    
+    Returns:
+        dict: host, welcome, logged_in, pwd (None if login failed) or error
+    """
+    conn = FTPConnectionAsync(host, port)
+    result = {'host': host, 'welcome': None, 'logged_in': False, 'pwd': None, 'error': None}
+    
+    try:
+        result['welcome'] = (await conn.connect()).strip()
+        
+        response = await conn.send_command(f"USER {username}")
+        if response.startswith('331'):
+            response = await conn.send_command(f"PASS {password}")
+        
+        if response.startswith('230'):
+            result['logged_in'] = True
+            result['pwd'] = (await conn.send_command("PWD")).strip()
+        
+        await conn.send_command("QUIT")
+    
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    
+    finally:
+        await conn.close()
+    
+    return result
+
+
+def check_login_many(hosts, port=21, username='anonymous', password='guest@example.com'):
+    """
+    Sync shim: run check_login() against every host concurrently.
+    
+    All sessions share one event loop, so total time is roughly the
+    slowest single session rather than the sum of all of them.
+    
+    Args:
+        hosts: List of FTP server addresses (repeats allowed)
+        port: FTP port
+        username: Login username
+        password: Login password
+    
+    Returns:
+        list: One result dict per host, in the same order
+    """
+    async def run_all():
+        return await asyncio.gather(
+            *(check_login(host, port, username, password) for host in hosts)
+        )
+    
+    return asyncio.run(run_all())
@@ -1,4 +1,78 @@
+import errno
+import logging
+import selectors
 import socket
+import ssl
+import time
+
+logger = logging.getLogger(__name__)
+
+# Every FTP command line ends with CRLF
+_CMD_SUFFIX = b"\r\n"
+
+# Argument-less commands, encoded once at import instead of on every send
+_PREENCODED = {
+    cmd: cmd.encode('ascii') + _CMD_SUFFIX
+    for cmd in ("PASV", "EPSV", "QUIT", "NOOP", "PWD", "CDUP", "SYST", "TYPE I", "TYPE A")
+}
+
+def _encode_command(command):
+    """
+    Turn one command into the bytes that go on the wire (CRLF included).
+    
+    Accepts str or bytes - hot paths can build commands as bytes
+    (b"SIZE " + name) and skip str formatting plus encode() entirely.
+    """
+    if isinstance(command, bytes):
+        return command + _CMD_SUFFIX
+    
+    # Commands with arguments - filenames may be non-ASCII, so UTF-8
+    return _PREENCODED.get(command) or command.encode('utf-8') + _CMD_SUFFIX
+
+
+# How long a resolved address is trusted before looking it up again
+_DNS_TTL = 300
+
+# (host, port) -> ([(family, sockaddr), ...], expires_at)
+_DNS_CACHE = {}
+
+# connect_ex() results that just mean "still connecting" on a non-blocking socket
+_CONNECT_IN_PROGRESS = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)}
+
+
+def _resolve(host, port):
+    """
+    Resolve host to at most one IPv6 and one IPv4 address, caching the answer
+    for _DNS_TTL seconds.
+    
+    socket.connect((hostname, port)) does a blocking DNS lookup every time.
+    Repeat connections to the same server (reconnects, every data
+    connection in PASV mode) can skip it.
+    
+    Returns:
+        list: [(family, sockaddr), ...] - IPv6 first if the host has one
+    """
+    key = (host, port)
+    now = time.monotonic()
+    
+    cached = _DNS_CACHE.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+    
+    # First address of each family is enough - we race one of each
+    first = {}
+    for family, _, _, _, sockaddr in socket.getaddrinfo(host, port, socket.AF_UNSPEC, socket.SOCK_STREAM):
+        if family in (socket.AF_INET6, socket.AF_INET):
+            first.setdefault(family, sockaddr)
+    
+    addrs = [(family, first[family]) for family in (socket.AF_INET6, socket.AF_INET) if family in first]
+    
+    if not addrs:
+        raise OSError(f"No IPv4/IPv6 address found for {host}")
+    
+    _DNS_CACHE[key] = (addrs, now + _DNS_TTL)
+    return addrs
+
 
 class FTPConnection:
     """
@@ -6,7 +80,14 @@ class FTPConnection:
     This class is protocol-agnostic - it just manages the socket.
     """
     
-    def __init__(self, host, port=21, timeout=30, is_control=True):
+    # Shared by every connection so TLS sessions can be resumed across them
+    _ssl_context = None
+    
+    # (host, port) -> last ssl.SSLSession seen for that server
+    _tls_sessions = {}
+    
+    def __init__(self, host, port=21, timeout=30, is_control=True, use_tls=False, tls_session=None,
+                 recv_buf=4*1024*1024):
         """
         Initialize connection parameters (doesn't connect yet)
         
@@ -15,13 +96,47 @@ class FTPConnection:
             port: FTP port
             timeout: Connection timeout in seconds
             is_control: True for control connection (expects welcome), False for data connection
+            use_tls: Secure the connection (explicit FTPS - AUTH TLS on control)
+            tls_session: TLS session to resume (data connections pass the control
+                         connection's session - many FTPS servers require it)
+            recv_buf: Kernel socket buffer size (SO_RCVBUF/SO_SNDBUF) for data connections
         """
         self.host = host
         self.port = port
         self.timeout = timeout
         self.is_control = is_control
+        self.use_tls = use_tls
+        self.tls_session = tls_session
+        self.recv_buf = recv_buf
         self.sock = None
         
+        # How much to ask for per recv() - replies are small, bulk data is not
+        self.recv_size = 4096 if is_control else 1024 * 1024
+        
+        # One receive buffer for the life of the connection - recv_into()
+        # fills it in place, so no new bytes object is created per chunk.
+        # Allocated on first read (see recv_view): upload-only data
+        # connections never need it
+        self._recv_buf = None
+        self._view = None
+        
+        # Bytes received past the end of the last reply
+        self._pending = bytearray()
+        
+        # Final line of the last reply read - the one that carries its status
+        # (for "227 ... (h1,h2,...)"-style replies, the part the caller wants)
+        self.last_line = ''
+    
+    @property
+    def recv_view(self):
+        """
+        memoryview of the connection's receive buffer, allocated on first use.
+        """
+        if self._view is None:
+            self._recv_buf = bytearray(self.recv_size)
+            self._view = memoryview(self._recv_buf)
+        return self._view
+    
     def connect(self):
         """
         Open TCP connection to the FTP server.
@@ -29,13 +144,19 @@ class FTPConnection:
         Returns:
             str: Welcome message (for control connection) or empty string (for data connection)
         """
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sock.settimeout(self.timeout)
+        self._pending = bytearray()
         
         try:
-            print(f"  [DEBUG] Attempting TCP connect to {self.host}:{self.port}...")
-            self.sock.connect((self.host, self.port))
-            print(f"  [DEBUG] TCP socket connected!")
+            logger.debug("Attempting TCP connect to %s:%s...", self.host, self.port)
+            
+            try:
+                self.sock = self._happy_connect()
+            except OSError:
+                # Address may be stale - look it up again next time
+                _DNS_CACHE.pop((self.host, self.port), None)
+                raise
+            
+            logger.debug("TCP socket connected!")
             
         except socket.timeout:
             raise TimeoutError(
@@ -59,75 +180,422 @@ class FTPConnection:
         # Control connection gets welcome message
         # Data connection doesn't
         if self.is_control:
-            print(f"  [DEBUG] Reading welcome message from control connection...")
+            logger.debug("Reading welcome message from control connection...")
             response = self._read_response()
-            print(f"  [DEBUG] Welcome received: {response.strip()[:50]}...")
+            logger.debug("Welcome received: %.50s...", response.strip())
+            
+            if self.use_tls:
+                # Explicit FTPS: ask to upgrade, then handshake on the same socket
+                auth_response = self.send_command("AUTH TLS")
+                
+                if not auth_response.startswith('234'):
+                    raise Exception(f"Server refused AUTH TLS: {auth_response.strip()}")
+                
+                self._start_tls()
+            
             return response
         else:
             # Data connection - no welcome message expected
-            print(f"  [DEBUG] Data connection ready (no welcome message)")
+            if self.use_tls:
+                self._start_tls()
+            
+            logger.debug("Data connection ready (no welcome message)")
             return ""
     
-    def _read_response(self):
+    def _new_socket(self, family):
+        """
+        Create a socket of the given family with this connection's options applied.
+        """
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        
+        if self.is_control:
+            # Commands are tiny request/response lines - send them immediately
+            # instead of letting Nagle hold them back waiting for an ACK
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            
+            # Let the OS notice dead peers on long-lived (pooled) connections
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        else:
+            # Bulk transfer: bigger kernel buffers = bigger TCP window in flight.
+            # Must be set BEFORE connect() - the window scale is agreed in the handshake.
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_buf)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.recv_buf)
+        
+        return sock
+    
+    def _happy_connect(self):
         """
-        Read response from server with timeout-based completion detection.
+        Connect over IPv6 and IPv4 at the same time and keep whichever wins
+        ("happy eyeballs").
+        
+        Trying addresses one after another means a broken IPv6 route costs a
+        full timeout before IPv4 is even attempted. Racing them means we wait
+        only as long as the faster family takes.
         
         Returns:
-            str: Complete server response
+            socket: Connected socket (the loser is closed)
         """
-        original_timeout = self.sock.gettimeout()
-        self.sock.settimeout(0.5)  # Short timeout for detecting end of response
+        addrs = _resolve(self.host, self.port)
+        
+        if len(addrs) == 1:
+            # Single-stack host - nothing to race
+            family, sockaddr = addrs[0]
+            sock = self._new_socket(family)
+            
+            try:
+                sock.connect(sockaddr)
+            except BaseException:
+                sock.close()
+                raise
+            
+            return sock
         
-        response = b''
+        sel = selectors.DefaultSelector()
+        pending = []
+        error = None
         
         try:
-            while True:
-                try:
-                    chunk = self.sock.recv(4096)
-                    
-                    if not chunk:
-                        break
+            # Start every connect without waiting for any of them
+            for family, sockaddr in addrs:
+                sock = self._new_socket(family)
+                sock.setblocking(False)
+                err = sock.connect_ex(sockaddr)
+                
+                if err in _CONNECT_IN_PROGRESS:
+                    sel.register(sock, selectors.EVENT_WRITE)
+                    pending.append(sock)
+                else:
+                    error = OSError(err, f"Connect to {sockaddr[0]} failed")
+                    sock.close()
+            
+            # Writable = connect finished; SO_ERROR says whether it worked
+            deadline = time.monotonic() + self.timeout
+            
+            while pending:
+                remaining = deadline - time.monotonic()
+                
+                if remaining <= 0:
+                    raise socket.timeout("timed out")
+                
+                for key, _ in sel.select(remaining):
+                    sock = key.fileobj
+                    sel.unregister(sock)
+                    pending.remove(sock)
                     
-                    response += chunk
+                    err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
                     
-                    # Check if we have a complete response
-                    if b'\n' in chunk:
-                        text = response.decode('utf-8', errors='ignore')
-                        lines = text.strip().split('\n')
-                        
-                        if lines:
-                            last_line = lines[-1]
-                            
-                            # FTP responses end with "XXX Message" (3 digits + space)
-                            if len(last_line) >= 4 and last_line[:3].isdigit() and last_line[3] == ' ':
-                                break
-                
-                except socket.timeout:
-                    # No more data - assume response is complete
-                    if response:
-                        break
+                    if err == 0:
+                        sock.settimeout(self.timeout)
+                        return sock
                     
+                    # OSError(errno, ...) builds the matching subclass (e.g. ConnectionRefusedError)
+                    error = OSError(err, f"Connect to {sock.family.name} address failed")
+                    sock.close()
+            
+            raise error
+        
         finally:
-            self.sock.settimeout(original_timeout)
+            # Close whatever didn't win
+            for sock in pending:
+                sock.close()
+            sel.close()
+    
+    @classmethod
+    def _get_ssl_context(cls):
+        """
+        Create the shared SSLContext on first use.
+        
+        One context for every connection is what makes resumption work -
+        sessions can only be resumed through the context that created them.
+        """
+        if cls._ssl_context is None:
+            cls._ssl_context = ssl.create_default_context()
+        return cls._ssl_context
+    
+    def _start_tls(self):
+        """
+        Wrap the connected socket in TLS, resuming a previous session if we have one.
+        
+        A resumed handshake skips the certificate exchange and key agreement,
+        so reconnects to the same server cost one round trip instead of two.
+        
+        Session priority:
+        1. tls_session given to __init__ (data channel reusing control's session)
+        2. Last session cached for this (host, port)
+        """
+        session = self.tls_session or self._tls_sessions.get((self.host, self.port))
+        
+        self.sock = self._get_ssl_context().wrap_socket(
+            self.sock,
+            server_hostname=self.host,
+            session=session,
+        )
+        
+        logger.debug("TLS established (resumed: %s)", self.sock.session_reused)
+        self._remember_tls_session()
+    
+    def _remember_tls_session(self):
+        """Cache this control connection's TLS session for the next connect to the same server."""
+        # Data ports change on every transfer - caching by them would only grow the dict
+        if not self.is_control:
+            return
+        
+        if isinstance(self.sock, ssl.SSLSocket) and self.sock.session is not None:
+            self._tls_sessions[(self.host, self.port)] = self.sock.session
+    
+    def _read_response(self, encoding='ascii'):
+        """
+        Read one complete server reply by following the FTP reply grammar.
+        
+        RFC 959 replies are either a single line:
+            "230 Login successful"
+        or a multi-line block that opens with "XXX-" and only ends at a
+        line starting with the SAME code followed by a space:
+            "211-Features:"
+            " EPSV"
+            "211 End"
+        
+        We return the instant the terminating line arrives - no waiting
+        for a timeout. The socket keeps its normal timeout, which now only
+        fires when the server genuinely stalls.
+        
+        Any bytes that arrive after the terminator (the start of the next
+        reply) are kept for the next call.
+        
+        The common case - one short single-line reply landing in one recv -
+        is checked first and returned without entering the parser loop.
+        
+        Args:
+            encoding: How to decode the reply. Protocol text is ASCII (RFC 959);
+                      pass 'utf-8' for replies that carry paths (PWD, MKD).
+        
+        The terminating line on its own is left in self.last_line.
+        
+        Returns:
+            str: Complete server response
+        """
+        buf = self._pending
+        self._pending = bytearray()
+        
+        if not buf:
+            # Fast path: nearly every reply is one short "XXX text\r\n" line that
+            # arrives in a single recv. Recognise that and return straight away.
+            view = self.recv_view
+            n = self.sock.recv_into(view)
+            
+            if (n > 4 and view[n - 1] == 0x0A and view[3] == 0x20
+                    and 48 <= view[0] <= 57 and 48 <= view[1] <= 57 and 48 <= view[2] <= 57
+                    and self._recv_buf.find(b'\n', 0, n - 1) == -1):
+                reply = str(view[:n], encoding, 'replace')
+                self.last_line = reply.rstrip()
+                return reply
+            
+            if not n:
+                # Server closed the connection
+                self.last_line = ''
+                return ''
+            
+            # Multi-line, partial or trailing data - hand it to the full parser
+            buf.extend(view[:n])
+        
+        line_start = 0   # Where the line currently being read begins
+        scan = 0         # Where to resume looking for the next newline
+        code = None      # Opening code of a multi-line reply ("XXX-"), as an int
+        final = None     # Where the terminating line begins, once found
+        
+        while True:
+            nl = buf.find(b'\n', scan)
+            
+            if nl == -1:
+                # No complete line yet - wait for more data
+                # (timeout sockets already wait with a single poll() per stall)
+                view = self.recv_view
+                n = self.sock.recv_into(view)
+                
+                if not n:
+                    # Server closed the connection
+                    break
+                
+                scan = len(buf)
+                buf.extend(view[:n])
+                continue
+            
+            # We have a complete line - only its first 4 bytes matter
+            start = line_start
+            line_start = scan = nl + 1
+            
+            if nl - start < 3:
+                # Too short to carry a reply code
+                continue
+            
+            # Check the code straight on the bytes - no slicing, no str objects.
+            # ASCII '0'..'9' are 48..57, so each digit must land in 0..9.
+            d0 = buf[start] - 48
+            d1 = buf[start + 1] - 48
+            d2 = buf[start + 2] - 48
+            
+            if not (0 <= d0 <= 9 and 0 <= d1 <= 9 and 0 <= d2 <= 9):
+                # Text line inside a multi-line reply
+                continue
+            
+            line_code = d0 * 100 + d1 * 10 + d2
+            sep = buf[start + 3]
+            
+            if code is None:
+                if sep == 0x2D:  # '-'
+                    # "XXX-" opens a multi-line reply
+                    code = line_code
+                    continue
+            elif line_code != code or sep != 0x20:  # ' '
+                # Digits, but not our "XXX " terminator
+                continue
+            
+            # Reply complete - save anything after it for next time
+            final = start
+            self._pending = buf[line_start:]
+            del buf[line_start:]
+            break
+        
+        # Decode exactly once, on the way out
+        reply = buf.decode(encoding, errors='replace')
         
-        return response.decode('utf-8', errors='ignore')
+        if final == 0:
+            # Single-line reply
+            self.last_line = reply.rstrip()
+        elif final is not None:
+            self.last_line = buf[final:].decode(encoding, errors='replace').rstrip()
+        else:
+            # Server hung up mid-reply - whatever line came last
+            self.last_line = reply.rstrip().rpartition('\n')[2]
+        
+        return reply
     
-    def send_command(self, command):
+    def send_command(self, command, encoding='ascii'):
         """
         Send command to FTP server and get response.
         
         Args:
-            command: FTP command
+            command: FTP command (str, or bytes without the CRLF)
+            encoding: How to decode the reply (see _read_response)
             
         Returns:
             str: Server's response
         """
-        full_command = f"{command}\r\n".encode('utf-8')
-        self.sock.sendall(full_command)
-        return self._read_response()
+        self.sock.sendall(_encode_command(command))
+        return self._read_response(encoding)
+    
+    def send_pipeline(self, commands):
+        """
+        Send several commands in ONE write, then read their replies in order.
+        
+        The server answers commands in the order it receives them, so there is
+        no need to wait for each reply before sending the next command:
+            one-at-a-time: send, wait, send, wait, send, wait  = 3 round trips
+            pipelined:     send send send, wait wait wait      = 1 round trip
+        
+        Args:
+            commands: List of FTP commands
+        
+        Returns:
+            list: Server's response to each command, in the same order
+        """
+        self.write_pipeline(commands)
+        return [self._read_response() for _ in commands]
+    
+    def write_pipeline(self, commands):
+        """
+        Send several commands in ONE write WITHOUT reading any replies.
+        
+        For when the caller has to act between replies - e.g. EPSV + RETR:
+        read the 229, open the data connection, THEN read the 150.
+        Each reply must be read afterwards with _read_response(), in order.
+        
+        Args:
+            commands: List of FTP commands (str or bytes, see send_command)
+        """
+        self.sock.sendall(b''.join(map(_encode_command, commands)))
+    
+    def send_file(self, fileobj, nbytes=None):
+        """
+        Send a file over this (data) connection without copying it through Python.
+        
+        socket.sendfile() uses the sendfile(2) syscall where available: the
+        kernel moves pages straight from the page cache to the socket, one
+        syscall per large chunk.
+        
+        TLS sockets can't use sendfile(2) - the data has to be encrypted in
+        user space - and socket.sendfile()'s own fallback then sends 8KB at
+        a time. For those we read big blocks and hand each to one sendall().
+        
+        Args:
+            fileobj: File opened in binary mode, positioned where sending should start
+            nbytes: How many bytes to send (default: until end of file)
+        
+        Returns:
+            int: Number of bytes sent
+        """
+        if isinstance(self.sock, ssl.SSLSocket):
+            return self._send_file_blocks(fileobj, nbytes)
+        
+        return self.sock.sendfile(fileobj, offset=fileobj.tell(), count=nbytes)
+    
+    def _send_file_blocks(self, fileobj, nbytes=None, block_size=1024 * 1024):
+        """
+        send_file() fallback: read up to block_size at a time, one sendall() each.
+        
+        Returns:
+            int: Number of bytes sent
+        """
+        total = 0
+        
+        while nbytes is None or total < nbytes:
+            want = block_size if nbytes is None else min(block_size, nbytes - total)
+            data = fileobj.read(want)
+            
+            if not data:
+                # End of file
+                break
+            
+            # The kernel splits one big write into segments itself
+            self.sock.sendall(data)
+            total += len(data)
+        
+        return total
+    
+    def recv_to_file(self, fileobj):
+        """
+        Receive everything the server sends on this (data) connection into a file.
+        
+        Reads into the connection's receive buffer with recv_into() instead of
+        allocating a new bytes object per chunk, and writes each chunk
+        out as it arrives - memory use stays at one buffer, whatever the size.
+        
+        Args:
+            fileobj: File opened for binary writing
+        
+        Returns:
+            int: Number of bytes received
+        """
+        view = self.recv_view
+        total = 0
+        
+        while True:
+            n = self.sock.recv_into(view)
+            
+            if not n:
+                # Server closed the data connection = transfer complete
+                break
+            
+            fileobj.write(view[:n])
+            total += n
+        
+        return total
     
     def close(self):
         """Close the TCP connection."""
         if self.sock:
+            # TLS 1.3 tickets arrive after the handshake - grab the latest one
+            self._remember_tls_session()
             self.sock.close()
             self.sock = None
\ No newline at end of file
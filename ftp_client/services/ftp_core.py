@@ -1,4 +1,61 @@
+import codecs
+import logging
+import os
+import re
+import time
+
 from .connection import FTPConnection
+from .pool import connection_pool
+
+logger = logging.getLogger(__name__)
+
+# Reply patterns, compiled once at import instead of on every reply
+_PASV_RE = re.compile(r'\((\d+),(\d+),(\d+),(\d+),(\d+),(\d+)\)')   # (h1,h2,h3,h4,p1,p2)
+_EPSV_RE = re.compile(r'\(\|\|\|(\d+)\|\)')                          # (|||port|)
+_QUOTED_RE = re.compile(r'"([^"]+)"')                                 # 257 "/path"
+
+# Prefixes of per-file commands, kept as bytes: commands on batch paths are
+# built as _SIZE + name.encode() instead of f"SIZE {name}" + encode()
+_RETR = b"RETR "
+_STOR = b"STOR "
+_SIZE = b"SIZE "
+_MDTM = b"MDTM "
+
+# Reply codes that mean the same thing to us, checked as ints
+_PASSIVE_OK = frozenset({227, 229})        # PASV / EPSV accepted
+_TRANSFER_START = frozenset({125, 150})    # Data transfer starting
+_NOT_SUPPORTED = frozenset({500, 502})     # Command unknown / not implemented
+
+
+def _code(line):
+    """
+    Reply code of a response line as an int - one parse, then int compares
+    instead of a startswith() per candidate code.
+    
+    Returns:
+        int: The 3-digit code, or 0 if the line doesn't start with one
+    """
+    head = line[:3]
+    return int(head) if head.isdigit() else 0
+
+
+class FTPError(Exception):
+    """
+    The server answered with a reply code we didn't expect.
+    
+    Carries the code as an int so callers can react to specific
+    failures (e.g. 550 = no such file) without parsing the message.
+    
+    Attributes:
+        code: 3-digit reply code (0 if the reply didn't start with one)
+        response: Full reply text from the server
+    """
+    
+    def __init__(self, code, response, message=None):
+        self.code = code
+        self.response = response
+        super().__init__(message or f"Unexpected reply: {response.strip()}")
+
 
 class FTPClient:
     """
@@ -25,6 +82,90 @@ class FTPClient:
         # Track login state
         self.logged_in = False
         self.host = host
+        self.port = port
+        
+        # Set by acquire() - where release() returns the connection
+        self._pool_key = None
+        
+        # Send USER/PASS/TYPE in one go at login (turned off automatically
+        # if the server can't handle pipelined commands)
+        self.pipelining = True
+        
+        # Transfer type the server is in ('A', 'I' or None = unknown), so
+        # TYPE I is only sent when it would actually change something
+        self.current_type = None
+        
+        # Does the server understand EPSV? None = don't know yet.
+        # Once it says no, we stop paying a round trip to ask again.
+        self._epsv_supported = None
+    
+    @classmethod
+    def acquire(cls, host, username='anonymous', password='guest@example.com', port=21):
+        """
+        Get a connected, logged-in client - reusing a pooled connection if possible.
+        
+        A pooled connection may have been dropped by the server while idle,
+        so it is checked with NOOP first:
+        - 200 = still alive, reuse it (no TCP connect, no USER/PASS)
+        - anything else / socket error = close it and try the next one
+        
+        If nothing usable is pooled, a new connection is opened and logged in.
+        
+        Args:
+            host: FTP server address
+            username: Login username
+            password: Login password
+            port: FTP port (default 21)
+        
+        Returns:
+            FTPClient: Client ready to use - check logged_in to see if login worked.
+                       Call release() when done instead of quit().
+        """
+        key = (host, port, username)
+        client = cls(host, port)
+        client._pool_key = key
+        
+        while True:
+            conn = connection_pool.get(key)
+            
+            if conn is None:
+                break
+            
+            try:
+                alive = conn.send_command("NOOP").startswith('200')
+            except OSError:
+                alive = False
+            
+            if alive:
+                logger.info("Reusing pooled connection to %s:%s", host, port)
+                client.connection = conn
+                client.logged_in = True
+                return client
+            
+            conn.close()
+        
+        # Nothing to reuse - full connect + login
+        client.connect()
+        client.login(username, password)
+        return client
+    
+    def release(self):
+        """
+        Hand the control connection back to the pool instead of closing it.
+        
+        Only logged-in clients created by acquire() are pooled; anything
+        else is disconnected normally with quit().
+        """
+        if self._pool_key is None or not self.logged_in or self.connection.sock is None:
+            self.quit()
+            return
+        
+        connection_pool.put(self._pool_key, self.connection)
+        logger.info("Connection returned to pool")
+        
+        # This client no longer owns the connection
+        self.connection = FTPConnection(self.host, self.port)
+        self.logged_in = False
         
     def connect(self):
         """
@@ -46,16 +187,43 @@ class FTPClient:
         # Open TCP connection and get welcome message
         welcome = self.connection.connect()
         
+        # New session - the server is back at its default type
+        self.current_type = None
+        
         # Print it so we can see what's happening
-        print(f"Server says: {welcome.strip()}")
+        logger.info("Server says: %s", welcome.strip())
         
         # Check if server is ready (should start with "220")
         # 220 = Service ready for new user
-        if not welcome.startswith('220'):
-            raise Exception(f"Unexpected welcome: {welcome}")
-            
+        self._expect(welcome, 220, cmd="Welcome")
+        
         return welcome
     
+    def _expect(self, response, *codes, cmd=''):
+        """
+        Check a reply against the codes that mean success for this step.
+        
+        One int parse and a membership test - and one place where every
+        "server said no" error gets raised.
+        
+        Args:
+            response: Server's reply
+            codes: Acceptable reply codes (ints)
+            cmd: Command name for the error message
+        
+        Returns:
+            int: The reply code
+        
+        Raises:
+            FTPError: If the code is not one of codes
+        """
+        code = _code(response)
+        
+        if code not in codes:
+            raise FTPError(code, response, f"{cmd} failed: {response.strip()}" if cmd else None)
+        
+        return code
+    
     def login(self, username='anonymous', password='guest@example.com'):
         """
         Authenticate with FTP server.
@@ -71,6 +239,10 @@ class FTPClient:
            - 230 = Login successful
            - 530 = Login failed
         
+        With pipelining on, USER, PASS and TYPE I are all sent at once
+        (1 round trip instead of 3); if the server can't cope we fall back
+        to the step-by-step flow above.
+        
         Args:
             username: Login username (default 'anonymous' for public servers)
             password: Login password (default email for anonymous FTP)
@@ -78,10 +250,21 @@ class FTPClient:
         Returns:
             bool: True if login successful, False otherwise
         """
+        # Servers may reset the transfer type on (re-)login
+        self.current_type = None
+        
+        if self.pipelining:
+            result = self._login_pipelined(username, password)
+            
+            if result is not None:
+                return result
+            
+            # None = server didn't handle the pipeline, do it step by step
+        
         # Step 1: Send username
-        print(f"\n-> Sending: USER {username}")
+        logger.debug("-> Sending: USER %s", username)
         user_response = self.connection.send_command(f"USER {username}")
-        print(f"<- Server says: {user_response.strip()}")
+        logger.debug("<- Server says: %s", user_response.strip())
         
         # Parse response code (first 3 characters)
         # "331 Password required" → code is "331"
@@ -91,37 +274,77 @@ class FTPClient:
         if response_code == '230':
             # 230 = User logged in, no password needed
             # (rare, but some servers allow this)
-            print("Logged in without password!")
+            logger.info("Logged in without password!")
             self.logged_in = True
             return True
             
         elif response_code == '331':
             # 331 = Need password
             # Server is waiting for PASS command
-            print("-> Password required, sending PASS command...")
+            logger.debug("-> Password required, sending PASS command...")
             pass_response = self.connection.send_command(f"PASS {password}")
-            print(f"<- Server says: {pass_response.strip()}")
+            logger.debug("<- Server says: %s", pass_response.strip())
             
             # Check password response
             pass_code = pass_response[:3]
             
             if pass_code == '230':
                 # 230 = Login successful
-                print("Login successful!")
+                logger.info("Login successful!")
                 self.logged_in = True
                 return True
             else:
                 # 530 or other = Login failed
-                print(f"✗ Login failed: {pass_response.strip()}")
+                logger.warning("✗ Login failed: %s", pass_response.strip())
                 self.logged_in = False
                 return False
                 
         else:
             # Unexpected response (not 230 or 331)
-            print(f"✗ Unexpected response to USER: {user_response.strip()}")
+            logger.warning("✗ Unexpected response to USER: %s", user_response.strip())
             self.logged_in = False
             return False
     
+    def _login_pipelined(self, username, password):
+        """
+        Send USER, PASS and TYPE I back-to-back and read the three replies.
+        
+        Returns:
+            bool: True/False if the login result is known
+            None: Server rejected the pipeline (500/503) - pipelining is
+                  switched off and the caller should log in step by step
+        """
+        logger.debug("-> Sending (pipelined): USER %s, PASS, TYPE I", username)
+        user_response, pass_response, type_response = self.connection.send_pipeline(
+            [f"USER {username}", f"PASS {password}", "TYPE I"]
+        )
+        logger.debug("<- Server says: %s", user_response.strip())
+        logger.debug("<- Server says: %s", pass_response.strip())
+        logger.debug("<- Server says: %s", type_response.strip())
+        
+        user_code = user_response[:3]
+        pass_code = pass_response[:3]
+        
+        # 230 to USER = no password needed, the extra PASS doesn't matter
+        if user_code == '230' or (user_code == '331' and pass_code == '230'):
+            logger.info("Login successful!")
+            self.logged_in = True
+            
+            if type_response.startswith('200'):
+                self.current_type = 'I'
+            
+            return True
+        
+        # 500/503 = server dropped or refused our queued command
+        if user_code in ('500', '503') or (user_code == '331' and pass_code in ('500', '503')):
+            logger.warning("Server doesn't support pipelining, logging in step by step...")
+            self.pipelining = False
+            return None
+        
+        logger.warning("✗ Login failed: %s", pass_response.strip() or user_response.strip())
+        self.logged_in = False
+        return False
+    
     def quit(self):
         """
         Properly disconnect from FTP server.
@@ -132,28 +355,28 @@ class FTPClient:
         Server should respond with:
         - 221 = Goodbye message
         """
-        print("\n→ Sending: QUIT")
+        logger.debug("→ Sending: QUIT")
         
         try:
             # Send QUIT command
             quit_response = self.connection.send_command("QUIT")
-            print(f"<- Server says: {quit_response.strip()}")
+            logger.debug("<- Server says: %s", quit_response.strip())
             
             # 221 = Service closing control connection
             if quit_response.startswith('221'):
-                print("Disconnected cleanly")
+                logger.info("Disconnected cleanly")
             else:
-                print(f"Unexpected QUIT response: {quit_response.strip()}")
+                logger.warning("Unexpected QUIT response: %s", quit_response.strip())
                 
         except Exception as e:
             # Sometimes server closes connection before we read response
             # That's okay, we're quitting anyway
-            print(f"Error during quit (probably harmless): {e}")
+            logger.warning("Error during quit (probably harmless): %s", e)
             
         finally:
             # Always close socket, even if QUIT command failed
             self.connection.close()
-            print("Socket closed")
+            logger.info("Socket closed")
 
     #########################
     # region DATA CONNECTION 
@@ -181,15 +404,13 @@ class FTPClient:
         Raises:
             ValueError: If response format is invalid
         """
-        import re
-        
         # Check if this is EPSV response (229 code)
         if response.startswith('229'):
             # EPSV format: "229 Extended Passive Mode Entered (|||port|)"
             # Sometimes also: "229 Entering Extended Passive Mode (|||port|)"
             
             # Extract port from (|||port|) format
-            match = re.search(r'\(\|\|\|(\d+)\|\)', response)
+            match = _EPSV_RE.search(response)
             
             if not match:
                 raise ValueError(f"Invalid EPSV response: {response}")
@@ -200,7 +421,7 @@ class FTPClient:
             # (that's the whole point of EPSV - simpler!)
             host = self.host
             
-            print("Using EPSV (Extended Passive Mode)")
+            logger.info("Using EPSV (Extended Passive Mode)")
             
             return host, port
         
@@ -208,21 +429,30 @@ class FTPClient:
         elif response.startswith('227'):
             # PASV format: "227 Entering Passive Mode (h1,h2,h3,h4,p1,p2)"
             
-            match = re.search(r'\((\d+),(\d+),(\d+),(\d+),(\d+),(\d+)\)', response)
+            # Fast path: find the parentheses and split on commas - no regex
+            start = response.find('(')
+            end = response.find(')', start + 1)
+            numbers = response[start + 1:end].split(',') if start != -1 and end != -1 else []
             
-            if not match:
-                raise ValueError(f"Invalid PASV response: {response}")
+            if len(numbers) != 6 or not all(n.strip().isdigit() for n in numbers):
+                # Unusual formatting (e.g. no parentheses) - let the regex look for it
+                match = _PASV_RE.search(response)
+                
+                if not match:
+                    raise ValueError(f"Invalid PASV response: {response}")
+                
+                numbers = match.groups()
             
             # Extract the 6 numbers
-            h1, h2, h3, h4, p1, p2 = match.groups()
+            h1, h2, h3, h4, p1, p2 = (n.strip() for n in numbers)
             
             # Construct IP address
             host = f"{h1}.{h2}.{h3}.{h4}"
             
-            # Calculate port number
-            port = int(p1) * 256 + int(p2)
+            # Calculate port number (p1 is the high byte)
+            port = (int(p1) << 8) + int(p2)
             
-            print("Using PASV (Passive Mode)")
+            logger.info("Using PASV (Passive Mode)")
             
             return host, port
         
@@ -230,78 +460,183 @@ class FTPClient:
             raise ValueError(f"Unknown passive mode response: {response}")
 
 
-    def _open_data_connection(self):
+    def _connect_data(self, last_line):
+        """
+        Open the data connection announced by a 227/229 reply.
+        
+        Args:
+            last_line: Last line of the PASV/EPSV reply
+        
+        Returns:
+            FTPConnection: Connected data connection
+        """
+        data_host, data_port = self._parse_pasv_response(last_line)
+        logger.info("Data connection: %s:%s", data_host, data_port)
+        
+        # Open data connection (is_control=False means no welcome message)
+        data_conn = FTPConnection(data_host, data_port, is_control=False)
+        data_conn.connect()
+        logger.info("Data connection established")
+        
+        return data_conn
+    
+    def _set_binary_mode(self):
+        """
+        Send TYPE I - unless the server is already in binary mode.
+        
+        Raises:
+            Exception: If the server refuses binary mode
+        """
+        if self.current_type == 'I':
+            return
+        
+        logger.debug("→ Sending: TYPE I (binary mode)")
+        type_response = self.connection.send_command("TYPE I")
+        logger.debug("← Server says: %s", type_response.strip())
+        
+        self._expect(type_response, 200, cmd="TYPE I")
+        
+        self.current_type = 'I'
+    
+    def _passive_command(self):
+        """
+        EPSV unless the server is known not to support it, then PASV.
+        """
+        return "PASV" if self._epsv_supported is False else "EPSV"
+    
+    def _note_passive_reply(self, command, last_line):
+        """
+        Remember what a passive-mode reply says about EPSV support.
+        
+        Args:
+            command: "EPSV" or "PASV" - what was sent
+            last_line: Terminating line of the reply
+        """
+        if command != "EPSV":
+            return
+        
+        code = _code(last_line)
+        
+        if code in _PASSIVE_OK:
+            self._epsv_supported = True
+        elif code in _NOT_SUPPORTED:
+            self._epsv_supported = False
+    
+    def _open_binary_data_connection(self):
+        """
+        Switch to binary mode and open a data connection.
+        
+        With pipelining on, TYPE I and EPSV (or PASV, on servers known not
+        to support EPSV) go out in ONE write, so the round trip for TYPE I
+        is hidden behind the passive-mode one.
+        If the server refuses we fall back to the normal EPSV/PASV dance.
+        
+        Returns:
+            FTPConnection: New connection object for data transfer
+        """
+        if self.current_type == 'I' or not self.pipelining:
+            # Nothing to hide TYPE I behind (or no need to send it at all)
+            self._set_binary_mode()
+            return self._open_data_connection()
+        
+        passive = self._passive_command()
+        logger.debug("-> Sending (pipelined): TYPE I, %s", passive)
+        type_response, _ = self.connection.send_pipeline(["TYPE I", passive])
+        
+        # Only the terminating line matters (in case of multi-line response)
+        last_line = self.connection.last_line
+        logger.debug("<- Server says: %s", type_response.strip())
+        logger.debug("<- Server says: %s", last_line)
+        
+        self._note_passive_reply(passive, last_line)
+        passive_ok = _code(last_line) in _PASSIVE_OK
+        
+        if _code(type_response) != 200:
+            if passive_ok:
+                # The server opened a passive port nothing will connect to
+                logger.debug("-> Sending: ABOR")
+                self.connection.send_command("ABOR")
+            
+            self._expect(type_response, 200, cmd="TYPE I")
+        
+        self.current_type = 'I'
+        
+        if passive_ok:
+            try:
+                return self._connect_data(last_line)
+            except Exception as e:
+                # Same as _open_data_connection(): a failed EPSV connect
+                # falls back to PASV
+                logger.warning("%s failed: %s", passive, e)
+            
+            return self._open_data_connection(try_epsv=False)
+        
+        # Refused - try again the slow way (ends up at PASV)
+        return self._open_data_connection()
+    
+    def _open_data_connection(self, try_epsv=True):
         """
         Open a data connection using EPSV or PASV mode.
         
         Note: Some servers return 229 (EPSV format) even when you send PASV.
         We handle both response formats for both commands.
         
+        Args:
+            try_epsv: False to go straight to PASV (EPSV was just tried)
+        
         Returns:
             FTPConnection: New connection object for data transfer
         """
         data_conn = None
         
-        # Try EPSV first (modern method)
-        print("\n-> Sending: EPSV (requesting extended passive mode)")
-        
-        try:
-            epsv_response = self.connection.send_command("EPSV")
-            
-            # Get only the last line (in case of multi-line response)
-            last_line = epsv_response.strip().split('\n')[-1]
-            print(f"<- Server says: {last_line}")
+        # Try EPSV first (modern method) - unless the server already told us no
+        if try_epsv and self._epsv_supported is not False:
+            logger.debug("-> Sending: EPSV (requesting extended passive mode)")
             
-            # Check response code
-            if last_line.startswith('229') or last_line.startswith('227'):
-                # Success! Parse response (handles both 229 and 227)
-                data_host, data_port = self._parse_pasv_response(last_line)
-                print(f"Data connection: {data_host}:{data_port}")
+            try:
+                self.connection.send_command("EPSV")
                 
-                # Open data connection (is_control=False means no welcome message)
-                data_conn = FTPConnection(data_host, data_port, is_control=False)
-                data_conn.connect()
-                print("Data connection established")
+                # Only the terminating line matters (in case of multi-line response)
+                last_line = self.connection.last_line
+                logger.debug("<- Server says: %s", last_line)
+                self._note_passive_reply("EPSV", last_line)
                 
-                return data_conn
+                # Check response code
+                if _code(last_line) in _PASSIVE_OK:
+                    # Success! Parse response (handles both 229 and 227)
+                    return self._connect_data(last_line)
                 
-            elif last_line.startswith('500') or last_line.startswith('502'):
-                # Server doesn't support EPSV
-                print("Server doesn't support EPSV, trying PASV...")
+                elif _code(last_line) in _NOT_SUPPORTED:
+                    # Server doesn't support EPSV - remembered, next time straight to PASV
+                    logger.warning("Server doesn't support EPSV, trying PASV...")
                 
-            else:
-                print(f"Unexpected EPSV response: {last_line}")
-        
-        except Exception as e:
-            print(f"EPSV failed: {e}")
+                else:
+                    logger.warning("Unexpected EPSV response: %s", last_line)
+            
+            except Exception as e:
+                logger.warning("EPSV failed: %s", e)
         
         # Try PASV (older method)
-        print("-> Sending: PASV (requesting passive mode)")
+        logger.debug("-> Sending: PASV (requesting passive mode)")
         
         try:
-            pasv_response = self.connection.send_command("PASV")
+            self.connection.send_command("PASV")
             
-            # Get only the last line
-            last_line = pasv_response.strip().split('\n')[-1]
-            print(f"<- Server says: {last_line}")
+            # Only the terminating line matters
+            last_line = self.connection.last_line
+            logger.debug("<- Server says: %s", last_line)
             
             # Some servers return 229 (EPSV format) even for PASV command!
-            if last_line.startswith('227') or last_line.startswith('229'):
-                # Parse response (handles both formats)
-                data_host, data_port = self._parse_pasv_response(last_line)
-                print(f"Data connection: {data_host}:{data_port}")
-                
-                # Open data connection (is_control=False means no welcome message)
-                data_conn = FTPConnection(data_host, data_port, is_control=False)
-                data_conn.connect()
-                print("Data connection established")
-                
-                return data_conn
-            else:
-                raise Exception(f"PASV failed: {last_line}")
+            self._expect(last_line, *_PASSIVE_OK, cmd="PASV")
+            
+            # Parse response (handles both formats)
+            return self._connect_data(last_line)
                 
+        except FTPError as e:
+            # Keep the reply code - callers branch on it
+            raise FTPError(e.code, e.response, f"Both EPSV and PASV failed. Error: {e}") from e
         except Exception as e:
-            raise Exception(f"Both EPSV and PASV failed. Error: {e}")
+            raise Exception(f"Both EPSV and PASV failed. Error: {e}") from e
         
     def list_files(self, path='.'):
         """
@@ -326,55 +661,61 @@ class FTPClient:
             raise Exception("Must login before listing files")
         
         # Step 1: Open data connection
-        print(f"\n-> Listing files in: {path}")
+        logger.info("Listing files in: %s", path)
         data_conn = self._open_data_connection()
         
         try:
             # Step 2: Send LIST command on CONTROL connection
-            print(f"-> Sending: LIST {path}")
+            logger.debug("-> Sending: LIST %s", path)
             list_response = self.connection.send_command(f"LIST {path}")
-            print(f"<- Server says: {list_response.strip()}")
+            logger.debug("<- Server says: %s", list_response.strip())
             
             # Response should be "150 Opening data connection" or similar
             # This means server is about to send data
-            if not (list_response.startswith('150') or list_response.startswith('125')):
-                raise Exception(f"LIST failed: {list_response}")
+            self._expect(list_response, *_TRANSFER_START, cmd="LIST")
             
             # Step 3: Read the file listing from DATA connection
             # Server sends listing, then closes data connection
-            print("Reading file listing from data connection...")
+            logger.info("Reading file listing from data connection...")
             
-            listing = b''  # Accumulate bytes
+            parts = []  # Decoded text pieces, joined once at the end
+            view = data_conn.recv_view  # Connection's reusable receive buffer
+            
+            # Decode each chunk as it arrives - no second full copy of the
+            # listing as bytes. The incremental decoder holds back a UTF-8
+            # character that happens to be split across two chunks.
+            decoder = codecs.getincrementaldecoder('utf-8')()
             
             while True:
-                # Read chunks from data connection
-                chunk = data_conn.sock.recv(4096)
+                # Read chunks from data connection straight into the buffer
+                n = data_conn.sock.recv_into(view)
                 
-                if not chunk:
-                    # Empty chunk = connection closed by server
+                if not n:
+                    # 0 bytes = connection closed by server
                     break
-                    
-                listing += chunk
+                
+                parts.append(decoder.decode(view[:n]))
             
-            # Convert bytes to string
-            listing_text = listing.decode('utf-8')
+            # Flush (raises if the listing ended in the middle of a character)
+            parts.append(decoder.decode(b'', final=True))
+            listing_text = ''.join(parts)
             
             # Step 4: Control connection should send completion message
             # "226 Transfer complete" or similar
             completion = self.connection._read_response()
-            print(f"<- Server says: {completion.strip()}")
+            logger.debug("<- Server says: %s", completion.strip())
             
             if not completion.startswith('226'):
-                print(f"Unexpected completion: {completion.strip()}")
+                logger.warning("Unexpected completion: %s", completion.strip())
             
-            print("File listing received")
+            logger.info("File listing received")
             
             return listing_text
             
         finally:
             # ALWAYS close data connection when done
             data_conn.close()
-            print("Data connection closed")
+            logger.info("Data connection closed")
 
     def pwd(self):
         """
@@ -386,18 +727,18 @@ class FTPClient:
         if not self.logged_in:
             raise Exception("Must login before using PWD")
         
-        print("\n→ Sending: PWD (print working directory)")
-        response = self.connection.send_command("PWD")
-        print(f"← Server says: {response.strip()}")
+        logger.debug("→ Sending: PWD (print working directory)")
+        # Reply carries a path - may be non-ASCII
+        response = self.connection.send_command("PWD", encoding='utf-8')
+        logger.debug("← Server says: %s", response.strip())
         
         # Response format: 257 "/path/to/dir" is current directory
         if response.startswith('257'):
             # Extract path from quotes
-            import re
-            match = re.search(r'"([^"]+)"', response)
+            match = _QUOTED_RE.search(response)
             if match:
                 current_dir = match.group(1)
-                print(f"  Current directory: {current_dir}")
+                logger.info("Current directory: %s", current_dir)
                 return current_dir
             else:
                 # Some servers don't use quotes
@@ -405,7 +746,7 @@ class FTPClient:
                 if len(parts) >= 2:
                     return parts[1]
         
-        raise Exception(f"PWD failed: {response}")
+        raise FTPError(_code(response), response, f"PWD failed: {response.strip()}")
 
 
     def cwd(self, path):
@@ -421,16 +762,16 @@ class FTPClient:
         if not self.logged_in:
             raise Exception("Must login before using CWD")
         
-        print(f"\n→ Sending: CWD {path}")
+        logger.debug("→ Sending: CWD %s", path)
         response = self.connection.send_command(f"CWD {path}")
-        print(f"← Server says: {response.strip()}")
+        logger.debug("← Server says: %s", response.strip())
         
         # 250 = Directory changed successfully
         if response.startswith('250'):
-            print(f"  ✓ Changed to: {path}")
+            logger.info("✓ Changed to: %s", path)
             return True
         else:
-            print("Failed to change directory")
+            logger.warning("Failed to change directory")
             return False
 
 
@@ -444,16 +785,16 @@ class FTPClient:
         if not self.logged_in:
             raise Exception("Must login before using CDUP")
         
-        print("\n→ Sending: CDUP (change to parent directory)")
+        logger.debug("→ Sending: CDUP (change to parent directory)")
         response = self.connection.send_command("CDUP")
-        print(f"← Server says: {response.strip()}")
+        logger.debug("← Server says: %s", response.strip())
         
         # 250 = Directory changed successfully
         if response.startswith('250'):
-            print("  ✓ Moved to parent directory")
+            logger.info("✓ Moved to parent directory")
             return True
         else:
-            print("  ✗ Failed to move to parent directory")
+            logger.warning("✗ Failed to move to parent directory")
             return False
 
     def download_file(self, remote_filename, local_filename=None):
@@ -476,78 +817,213 @@ class FTPClient:
         if local_filename is None:
             local_filename = remote_filename
         
-        print(f"\n→ Downloading: {remote_filename} → {local_filename}")
-        
-        # Step 1: Set binary mode (important for non-text files!)
-        print("→ Sending: TYPE I (binary mode)")
-        type_response = self.connection.send_command("TYPE I")
-        print(f"← Server says: {type_response.strip()}")
-        
-        if not type_response.startswith('200'):
-            raise Exception(f"Failed to set binary mode: {type_response}")
+        logger.info("Downloading: %s → %s", remote_filename, local_filename)
         
-        # Step 2: Open data connection
-        data_conn = self._open_data_connection()
+        # Step 1 + 2: Set binary mode (important for non-text files!)
+        # and open data connection
+        data_conn = self._open_binary_data_connection()
         
         try:
             # Step 3: Send RETR command on control connection
-            print(f"→ Sending: RETR {remote_filename}")
-            retr_response = self.connection.send_command(f"RETR {remote_filename}")
-            print(f"← Server says: {retr_response.strip()}")
+            logger.debug("→ Sending: RETR %s", remote_filename)
+            retr_response = self.connection.send_command(_RETR + remote_filename.encode('utf-8'))
+            logger.debug("← Server says: %s", retr_response.strip())
             
             # Check if server is sending file
             # 150 = About to open data connection
             # 125 = Data connection already open, transfer starting
-            if not (retr_response.startswith('150') or retr_response.startswith('125')):
+            retr_code = _code(retr_response)
+            
+            if retr_code not in _TRANSFER_START:
                 # Check for common errors
-                if retr_response.startswith('550'):
-                    raise Exception(f"File not found: {remote_filename}")
+                if retr_code == 550:
+                    raise FTPError(retr_code, retr_response, f"File not found: {remote_filename}")
                 else:
-                    raise Exception(f"RETR failed: {retr_response}")
+                    raise FTPError(retr_code, retr_response, f"RETR failed: {retr_response.strip()}")
             
-            # Step 4: Read file data from data connection
-            print("  Reading file data...")
+            # Step 4: Read file data from data connection, writing each chunk
+            # to disk as it arrives (never holding the whole file in memory)
+            logger.info("Reading file data into: %s", local_filename)
             
-            file_data = b''
             bytes_received = 0
+            view = data_conn.recv_view  # Reused for every chunk - no new bytes objects
+            last_report = time.monotonic()
+            next_report = 102400  # Byte count at which to look at the clock again
             
-            while True:
-                chunk = data_conn.sock.recv(8192)  # 8KB chunks
-                
-                if not chunk:
-                    # Server closed connection = transfer complete
-                    break
-                
-                file_data += chunk
-                bytes_received += len(chunk)
-                
-                # Show progress every 100KB
-                if bytes_received % 102400 == 0:
-                    print(f"  Received: {bytes_received:,} bytes...")
-            
-            print(f"  ✓ Received {bytes_received:,} bytes")
-            
-            # Step 5: Save to local file
-            print(f"  Writing to: {local_filename}")
-            with open(local_filename, 'wb') as f:
-                f.write(file_data)
+            # Raw file descriptor instead of open(): chunks are already 1MB,
+            # so a buffered file object would only add a copy per chunk.
+            # os.write() is the write(2) syscall, nothing in between.
+            fd = os.open(local_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
             
-            print("File saved!")
-            
-            # Step 6: Read completion message from control connection
+            try:
+                while True:
+                    n = data_conn.sock.recv_into(view)
+                    
+                    if not n:
+                        # Server closed connection = transfer complete
+                        break
+                    
+                    # write(2) may take less than asked - loop until the chunk is out
+                    chunk = view[:n]
+                    while chunk:
+                        chunk = chunk[os.write(fd, chunk):]
+                    
+                    bytes_received += n
+                    
+                    # Show progress at most every 100KB and at most twice a second.
+                    # (A modulus like "% 102400 == 0" rarely hits - chunk sizes vary.)
+                    if bytes_received >= next_report:
+                        next_report = bytes_received + 102400
+                        now = time.monotonic()
+                        
+                        if now - last_report > 0.5:
+                            logger.info("Received: %d bytes...", bytes_received)
+                            last_report = now
+            
+            finally:
+                os.close(fd)
+            
+            logger.info("✓ Received %d bytes", bytes_received)
+            logger.info("File saved!")
+            
+            # Step 5: Read completion message from control connection
             completion = self.connection._read_response()
-            print(f"← Server says: {completion.strip()}")
+            logger.debug("← Server says: %s", completion.strip())
             
             if not completion.startswith('226'):
-                print(f"Unexpected completion: {completion.strip()}")
+                logger.warning("Unexpected completion: %s", completion.strip())
             
             return bytes_received
             
         finally:
             # Always close data connection
             data_conn.close()
-            print("  Data connection closed")
+            logger.info("Data connection closed")
 
+    def download_many(self, remote_filenames, local_dir='.'):
+        """
+        Download several files, one round trip of setup per file.
+        
+        For each file EPSV and RETR are sent in ONE write. The server
+        answers EPSV first, we connect to the announced port, then read
+        the RETR reply - the RETR was already waiting at the server.
+        
+        A data connection can't be kept for the next file: in stream mode
+        the server closing it is how we know the file ended. Instead the
+        NEXT file's EPSV + RETR are sent as soon as this file's data is in,
+        before reading its "226" - so the server finds them waiting and
+        the gap between files shrinks by another round trip.
+        
+        Args:
+            remote_filenames: Names of files on server
+            local_dir: Directory to save them in
+        
+        Returns:
+            dict: remote filename -> bytes downloaded (None if it failed)
+        """
+        if not self.logged_in:
+            raise Exception("Must login before downloading")
+        
+        results = {}
+        names = list(remote_filenames)
+        
+        # Binary mode once for the whole batch
+        self._set_binary_mode()
+        
+        # Passive-mode command queued for the file being read next
+        passive = self._queue_retr(names[0]) if names else None
+        
+        for i, remote_filename in enumerate(names):
+            following = names[i + 1] if i + 1 < len(names) else None
+            local_filename = os.path.join(local_dir, os.path.basename(remote_filename))
+            logger.info("Downloading: %s → %s", remote_filename, local_filename)
+            
+            self.connection._read_response()
+            last_line = self.connection.last_line
+            logger.debug("← Server says: %s", last_line)
+            self._note_passive_reply(passive, last_line)
+            
+            if _code(last_line) not in _PASSIVE_OK:
+                # No data port - the queued RETR gets refused too, read that reply
+                retr_response = self.connection._read_response()
+                logger.debug("← Server says: %s", retr_response.strip())
+                results[remote_filename] = None
+                
+                if passive == "EPSV" and self._epsv_supported is False:
+                    # Server just told us it has no EPSV - fetch this one over
+                    # PASV (the rest of the batch will queue PASV by itself)
+                    try:
+                        results[remote_filename] = self.download_file(remote_filename, local_filename)
+                    except Exception as e:
+                        logger.warning("✗ Download failed: %s", e)
+                
+                passive = self._queue_retr(following)
+                continue
+            
+            try:
+                data_conn = self._connect_data(last_line)
+            except Exception:
+                # Server may have refused the RETR (e.g. 550) and closed the
+                # data port before we got there - its reply tells us
+                retr_response = self.connection._read_response()
+                logger.debug("← Server says: %s", retr_response.strip())
+                
+                if _code(retr_response) in _TRANSFER_START:
+                    raise
+                
+                results[remote_filename] = None
+                passive = self._queue_retr(following)
+                continue
+            
+            try:
+                retr_response = self.connection._read_response()
+                logger.debug("← Server says: %s", retr_response.strip())
+                
+                if _code(retr_response) not in _TRANSFER_START:
+                    results[remote_filename] = None
+                    passive = self._queue_retr(following)
+                    continue
+                
+                with open(local_filename, 'wb') as f:
+                    bytes_received = data_conn.recv_to_file(f)
+            
+            finally:
+                data_conn.close()
+            
+            # Data is all in - get the next file going before reading the 226
+            passive = self._queue_retr(following)
+            
+            completion = self.connection._read_response()
+            logger.debug("← Server says: %s", completion.strip())
+            
+            if completion.startswith('226'):
+                logger.info("✓ Received %d bytes", bytes_received)
+                results[remote_filename] = bytes_received
+            else:
+                logger.warning("Unexpected completion: %s", completion.strip())
+                results[remote_filename] = None
+        
+        return results
+    
+    def _queue_retr(self, remote_filename):
+        """
+        Send EPSV (or PASV) + RETR for one file without waiting for the replies
+        (download_many() reads them later, in order).
+        
+        Args:
+            remote_filename: File to request, or None to do nothing
+        
+        Returns:
+            str: Passive-mode command used ("EPSV" or "PASV"), None if nothing sent
+        """
+        if remote_filename is None:
+            return None
+        
+        passive = self._passive_command()
+        logger.debug("→ Sending (pipelined): %s, RETR %s", passive, remote_filename)
+        self.connection.write_pipeline([passive, _RETR + remote_filename.encode('utf-8')])
+        return passive
+    
     def upload_file(self, local_filename, remote_filename=None):
         """
         Upload a file to the FTP server.
@@ -564,76 +1040,80 @@ class FTPClient:
         
         # Default to same filename
         if remote_filename is None:
-            import os
             remote_filename = os.path.basename(local_filename)
         
-        print(f"\n→ Uploading: {local_filename} → {remote_filename}")
+        logger.info("Uploading: %s → %s", local_filename, remote_filename)
         
-        # Step 1: Read local file
+        # Step 1: Check local file (it is streamed later, never read into memory)
         try:
-            with open(local_filename, 'rb') as f:
-                file_data = f.read()
-            print(f"  Read {len(file_data):,} bytes from local file")
+            file_size = os.path.getsize(local_filename)
+            logger.info("Local file is %d bytes", file_size)
         except FileNotFoundError:
             raise Exception(f"Local file not found: {local_filename}")
         
-        # Step 2: Set binary mode
-        print("→ Sending: TYPE I (binary mode)")
-        type_response = self.connection.send_command("TYPE I")
-        print(f"← Server says: {type_response.strip()}")
-        
-        if not type_response.startswith('200'):
-            raise Exception(f"Failed to set binary mode: {type_response}")
-        
-        # Step 3: Open data connection
-        data_conn = self._open_data_connection()
+        # Step 2 + 3: Set binary mode and open data connection
+        data_conn = self._open_binary_data_connection()
         
         try:
             # Step 4: Send STOR command on control connection
-            print(f"→ Sending: STOR {remote_filename}")
-            stor_response = self.connection.send_command(f"STOR {remote_filename}")
-            print(f"← Server says: {stor_response.strip()}")
+            logger.debug("→ Sending: STOR %s", remote_filename)
+            stor_response = self.connection.send_command(_STOR + remote_filename.encode('utf-8'))
+            logger.debug("← Server says: %s", stor_response.strip())
             
             # Check if server is ready to receive
-            if not (stor_response.startswith('150') or stor_response.startswith('125')):
+            stor_code = _code(stor_response)
+            
+            if stor_code not in _TRANSFER_START:
                 # Check for permission errors
-                if stor_response.startswith('550'):
-                    raise Exception(f"Permission denied or cannot create file: {remote_filename}")
-                elif stor_response.startswith('553'):
-                    raise Exception(f"Filename not allowed: {remote_filename}")
+                if stor_code == 550:
+                    raise FTPError(stor_code, stor_response, f"Permission denied or cannot create file: {remote_filename}")
+                elif stor_code == 553:
+                    raise FTPError(stor_code, stor_response, f"Filename not allowed: {remote_filename}")
                 else:
-                    raise Exception(f"STOR failed: {stor_response}")
+                    raise FTPError(stor_code, stor_response, f"STOR failed: {stor_response.strip()}")
             
-            # Step 5: Write file data to data connection
-            print("  Sending file data...")
+            # Step 5: Write file data to data connection.
+            # send_file() uses sendfile(2): the kernel copies straight from the
+            # page cache to the socket, the data never passes through Python
+            # (it falls back to a read/send loop by itself where unsupported).
+            logger.info("Sending file data...")
             
             bytes_sent = 0
-            chunk_size = 8192  # 8KB chunks
+            chunk_size = 1024 * 1024  # 1MB per sendfile() call
+            next_report = 102400
             
-            # Send in chunks to show progress
-            for i in range(0, len(file_data), chunk_size):
-                chunk = file_data[i:i+chunk_size]
-                data_conn.sock.sendall(chunk)
-                bytes_sent += len(chunk)
-                
-                # Show progress every 100KB
-                if bytes_sent % 102400 == 0:
-                    print(f"  Sent: {bytes_sent:,} / {len(file_data):,} bytes...")
+            # Send in chunks to show progress - each call continues where
+            # the last one left off (sendfile moves the file position)
+            with open(local_filename, 'rb') as f:
+                while True:
+                    sent = data_conn.send_file(f, chunk_size)
+                    
+                    if not sent:
+                        # End of file
+                        break
+                    
+                    bytes_sent += sent
+                    
+                    # Show progress every 100KB (a threshold - "% 102400 == 0"
+                    # would only hit when the total lands exactly on a multiple)
+                    if bytes_sent >= next_report:
+                        logger.info("Sent: %d / %d bytes...", bytes_sent, file_size)
+                        next_report = bytes_sent + 102400
             
-            print(f"  ✓ Sent {bytes_sent:,} bytes")
+            logger.info("✓ Sent %d bytes", bytes_sent)
             
             # Step 6: Close data connection (signals upload complete)
             data_conn.close()
-            print("  Data connection closed (upload complete)")
+            logger.info("Data connection closed (upload complete)")
             
             # Step 7: Read completion message from control connection
             completion = self.connection._read_response()
-            print(f"← Server says: {completion.strip()}")
+            logger.debug("← Server says: %s", completion.strip())
             
             if completion.startswith('226'):
-                print("  ✓ Upload successful!")
+                logger.info("✓ Upload successful!")
             else:
-                print(f"  ⚠ Unexpected completion: {completion.strip()}")
+                logger.warning("⚠ Unexpected completion: %s", completion.strip())
             
             return bytes_sent
             
@@ -658,19 +1138,19 @@ class FTPClient:
         if not self.logged_in:
             raise Exception("Must login before deleting files")
         
-        print(f"\n→ Deleting file: {filename}")
+        logger.info("Deleting file: %s", filename)
         response = self.connection.send_command(f"DELE {filename}")
-        print(f"← Server says: {response.strip()}")
+        logger.debug("← Server says: %s", response.strip())
         
         # 250 = File deleted successfully
         if response.startswith('250'):
-            print(f"  ✓ File deleted: {filename}")
+            logger.info("✓ File deleted: %s", filename)
             return True
         elif response.startswith('550'):
-            print(f"  ✗ File not found or permission denied")
+            logger.warning("✗ File not found or permission denied")
             return False
         else:
-            print(f"  ✗ Delete failed: {response.strip()}")
+            logger.warning("✗ Delete failed: %s", response.strip())
             return False
 
     def make_directory(self, dirname):
@@ -686,27 +1166,26 @@ class FTPClient:
         if not self.logged_in:
             raise Exception("Must login before creating directories")
         
-        print(f"\n→ Creating directory: {dirname}")
-        response = self.connection.send_command(f"MKD {dirname}")
-        print(f"← Server says: {response.strip()}")
+        logger.info("Creating directory: %s", dirname)
+        response = self.connection.send_command(f"MKD {dirname}", encoding='utf-8')
+        logger.debug("← Server says: %s", response.strip())
         
         # 257 = Directory created
         if response.startswith('257'):
             # Extract directory path from quotes
-            import re
-            match = re.search(r'"([^"]+)"', response)
+            match = _QUOTED_RE.search(response)
             if match:
                 created_path = match.group(1)
-                print(f"  ✓ Directory created: {created_path}")
+                logger.info("✓ Directory created: %s", created_path)
                 return created_path
             else:
-                print("  ✓ Directory created")
+                logger.info("✓ Directory created")
                 return dirname
         elif response.startswith('550'):
-            print(f"  ✗ Cannot create directory (may already exist or permission denied)")
+            logger.warning("✗ Cannot create directory (may already exist or permission denied)")
             return None
         else:
-            print(f"  ✗ Failed: {response.strip()}")
+            logger.warning("✗ Failed: %s", response.strip())
             return None
 
     def remove_directory(self, dirname):
@@ -722,19 +1201,19 @@ class FTPClient:
         if not self.logged_in:
             raise Exception("Must login before removing directories")
         
-        print(f"\n→ Removing directory: {dirname}")
+        logger.info("Removing directory: %s", dirname)
         response = self.connection.send_command(f"RMD {dirname}")
-        print(f"← Server says: {response.strip()}")
+        logger.debug("← Server says: %s", response.strip())
         
         # 250 = Directory removed
         if response.startswith('250'):
-            print(f"  ✓ Directory removed: {dirname}")
+            logger.info("✓ Directory removed: %s", dirname)
             return True
         elif response.startswith('550'):
-            print(f"  ✗ Directory not found or not empty")
+            logger.warning("✗ Directory not found or not empty")
             return False
         else:
-            print(f"  ✗ Failed: {response.strip()}")
+            logger.warning("✗ Failed: %s", response.strip())
             return False
 
     def rename(self, old_name, new_name):
@@ -755,29 +1234,29 @@ class FTPClient:
         if not self.logged_in:
             raise Exception("Must login before renaming files")
         
-        print(f"\n→ Renaming: {old_name} → {new_name}")
+        logger.info("Renaming: %s → %s", old_name, new_name)
         
         # Step 1: Send RNFR command
-        print(f"→ Sending: RNFR {old_name}")
+        logger.debug("→ Sending: RNFR %s", old_name)
         rnfr_response = self.connection.send_command(f"RNFR {old_name}")
-        print(f"← Server says: {rnfr_response.strip()}")
+        logger.debug("← Server says: %s", rnfr_response.strip())
         
         # 350 = Ready for RNTO
         if not rnfr_response.startswith('350'):
-            print(f"  ✗ RNFR failed (file not found?)")
+            logger.warning("✗ RNFR failed (file not found?)")
             return False
         
         # Step 2: Send RNTO command
-        print(f"→ Sending: RNTO {new_name}")
+        logger.debug("→ Sending: RNTO %s", new_name)
         rnto_response = self.connection.send_command(f"RNTO {new_name}")
-        print(f"← Server says: {rnto_response.strip()}")
+        logger.debug("← Server says: %s", rnto_response.strip())
         
         # 250 = Rename successful
         if rnto_response.startswith('250'):
-            print(f"  ✓ Renamed successfully")
+            logger.info("✓ Renamed successfully")
             return True
         else:
-            print(f"  ✗ RNTO failed: {rnto_response.strip()}")
+            logger.warning("✗ RNTO failed: %s", rnto_response.strip())
             return False
 
     def get_file_size(self, filename):
@@ -793,9 +1272,9 @@ class FTPClient:
         if not self.logged_in:
             raise Exception("Must login before getting file size")
         
-        print(f"\n→ Getting size of: {filename}")
-        response = self.connection.send_command(f"SIZE {filename}")
-        print(f"← Server says: {response.strip()}")
+        logger.info("Getting size of: %s", filename)
+        response = self.connection.send_command(_SIZE + filename.encode('utf-8'))
+        logger.debug("← Server says: %s", response.strip())
         
         # 213 = File size response
         if response.startswith('213'):
@@ -804,12 +1283,12 @@ class FTPClient:
             if len(parts) >= 2:
                 try:
                     size = int(parts[1])
-                    print(f"  File size: {size:,} bytes")
+                    logger.info("File size: %d bytes", size)
                     return size
                 except ValueError:
                     pass
         
-        print(f"  ✗ Failed to get file size")
+        logger.warning("✗ Failed to get file size")
         return None
 
     def get_modification_time(self, filename):
@@ -825,9 +1304,9 @@ class FTPClient:
         if not self.logged_in:
             raise Exception("Must login before getting modification time")
         
-        print(f"\n→ Getting modification time of: {filename}")
-        response = self.connection.send_command(f"MDTM {filename}")
-        print(f"← Server says: {response.strip()}")
+        logger.info("Getting modification time of: %s", filename)
+        response = self.connection.send_command(_MDTM + filename.encode('utf-8'))
+        logger.debug("← Server says: %s", response.strip())
         
         # 213 = Modification time response
         if response.startswith('213'):
@@ -835,12 +1314,69 @@ class FTPClient:
             parts = response.split()
             if len(parts) >= 2:
                 timestamp = parts[1]
-                print(f"  Modification time: {timestamp}")
+                logger.info("Modification time: %s", timestamp)
                 return timestamp
         
-        print(f"  ✗ Failed to get modification time")
+        logger.warning("✗ Failed to get modification time")
         return None
 
+    def stat_many(self, filenames, batch_size=100):
+        """
+        Get size and modification time of many files with pipelined SIZE/MDTM.
+        
+        Asking one file at a time costs 2 round trips per file. Here the
+        SIZE and MDTM commands for a whole batch go out in ONE write and the
+        replies are read back in order - about 1 round trip per batch.
+        
+        Batches are capped so neither side's socket buffer fills up while
+        the other is still writing (which would stall both).
+        
+        Args:
+            filenames: Names of files on server
+            batch_size: Files per pipelined write
+        
+        Returns:
+            dict: filename -> (size, mtime); either is None if the server refused it
+        """
+        if not self.logged_in:
+            raise Exception("Must login before getting file info")
+        
+        names = list(filenames)
+        results = {}
+        
+        for start in range(0, len(names), batch_size):
+            batch = names[start:start + batch_size]
+            logger.debug("→ Sending (pipelined): SIZE + MDTM for %d files", len(batch))
+            
+            commands = []
+            for name in batch:
+                encoded = name.encode('utf-8')
+                commands.append(_SIZE + encoded)
+                commands.append(_MDTM + encoded)
+            
+            replies = self.connection.send_pipeline(commands)
+            
+            # Replies come back in command order: SIZE, MDTM, SIZE, MDTM, ...
+            for name, size_response, mdtm_response in zip(batch, replies[::2], replies[1::2]):
+                size = None
+                mtime = None
+                
+                # 213 = File status ("213 12345" / "213 20240101120000")
+                if size_response.startswith('213'):
+                    parts = size_response.split()
+                    if len(parts) >= 2 and parts[1].isdigit():
+                        size = int(parts[1])
+                
+                if mdtm_response.startswith('213'):
+                    parts = mdtm_response.split()
+                    if len(parts) >= 2:
+                        mtime = parts[1]
+                
+                results[name] = (size, mtime)
+        
+        logger.info("Got file info for %d files", len(results))
+        return results
+    
     def noop(self):
         """
         Send NOOP (No Operation) command to keep connection alive.
@@ -851,9 +1387,9 @@ class FTPClient:
         if not self.logged_in:
             raise Exception("Must login before using NOOP")
         
-        print("\n→ Sending: NOOP (keep alive)")
+        logger.debug("→ Sending: NOOP (keep alive)")
         response = self.connection.send_command("NOOP")
-        print(f"← Server says: {response.strip()}")
+        logger.debug("← Server says: %s", response.strip())
         
         # 200 = Command okay
         return response.startswith('200')
@@ -868,19 +1404,57 @@ class FTPClient:
         if not self.logged_in:
             raise Exception("Must login before getting system type")
         
-        print("\n→ Sending: SYST (get system type)")
+        logger.debug("→ Sending: SYST (get system type)")
         response = self.connection.send_command("SYST")
-        print(f"← Server says: {response.strip()}")
+        logger.debug("← Server says: %s", response.strip())
         
         # 215 = System type response
         if response.startswith('215'):
             # Extract system type
             system_type = response[4:].strip()
-            print(f"  System type: {system_type}")
+            logger.info("System type: %s", system_type)
             return system_type
         
         return None
 
+    def features(self):
+        """
+        Ask the server which optional features it supports (FEAT, RFC 2389).
+        
+        Response is multi-line, one feature per indented line:
+            211-Features:
+             EPSV
+             MDTM
+             SIZE
+            211 End
+        
+        The answer also tells us whether EPSV is worth trying, so data
+        connections go straight to PASV on servers that don't list it.
+        
+        Returns:
+            set: Feature names in upper case (empty if FEAT isn't supported)
+        """
+        logger.debug("→ Sending: FEAT (list server features)")
+        response = self.connection.send_command("FEAT")
+        logger.debug("← Server says: %s", response.strip())
+        
+        # 211 = System status / feature list
+        if not response.startswith('211'):
+            # Old server without FEAT - tells us nothing about EPSV
+            return set()
+        
+        features = set()
+        
+        for line in response.splitlines()[1:-1]:
+            # Feature lines start with a space: " MDTM", " REST STREAM"
+            words = line.split()
+            if words:
+                features.add(words[0].upper())
+        
+        self._epsv_supported = 'EPSV' in features
+        logger.info("Server features: %s", ', '.join(sorted(features)))
+        return features
+    
     def set_transfer_type(self, type_code):
         """
         Set the transfer type (ASCII or Binary).
@@ -897,10 +1471,19 @@ class FTPClient:
         if type_code not in ['A', 'I']:
             raise ValueError("Type must be 'A' (ASCII) or 'I' (Binary)")
         
+        # Already in that mode - save the round trip
+        if self.current_type == type_code:
+            return True
+        
         type_name = "ASCII" if type_code == 'A' else "Binary"
-        print(f"\n→ Setting transfer type to: {type_name}")
+        logger.info("Setting transfer type to: %s", type_name)
         response = self.connection.send_command(f"TYPE {type_code}")
-        print(f"← Server says: {response.strip()}")
+        logger.debug("← Server says: %s", response.strip())
         
         # 200 = Type set successfully
-        return response.startswith('200')
\ No newline at end of file
+        if response.startswith('200'):
+            self.current_type = type_code
+            return True
+        
+        self.current_type = None
+        return False
\ No newline at end of file
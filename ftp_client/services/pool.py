@@ -0,0 +1,194 @@
+import threading
+import time
+
+
+class ConnectionPool:
+    """
+    Keeps logged-in FTP control connections warm for reuse.
+    
+    Every fresh FTPClient pays for a TCP handshake, the welcome message,
+    USER and PASS before it can do anything useful. If the same
+    (host, port, user) is used again shortly after, we can hand back the
+    already-authenticated connection instead and skip all of that.
+    
+    Connections are keyed by (host, port, user) - a connection logged in
+    as one user must never be handed out to another.
+    
+    Servers drop control connections that sit silent for a while, so each
+    idle connection gets a NOOP every keepalive_interval seconds. Idle
+    connections are closed by a background sweeper once they have been
+    unused for longer than idle_timeout seconds.
+    """
+    
+    def __init__(self, idle_timeout=60, keepalive_interval=30):
+        """
+        Create an empty pool.
+        
+        Args:
+            idle_timeout: Seconds an unused connection is kept before closing
+            keepalive_interval: Seconds between NOOPs on an idle connection
+        """
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        
+        # (host, port, user) -> [[FTPConnection, released_at, keepalive_timer], ...]
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._sweeper = None
+    
+    def get(self, key):
+        """
+        Take an idle connection out of the pool.
+        
+        The caller is responsible for checking it is still alive.
+        
+        Args:
+            key: (host, port, user) tuple
+        
+        Returns:
+            FTPConnection: Most recently released connection, or None
+        """
+        with self._lock:
+            conns = self._idle.get(key)
+            
+            if not conns:
+                return None
+            
+            # Most recently used = least likely to have been dropped by server
+            conn, _, timer = conns.pop()
+            
+            if not conns:
+                del self._idle[key]
+        
+        # Checked out - the caller is talking on it now, stop pinging
+        timer.cancel()
+        return conn
+    
+    def put(self, key, conn):
+        """
+        Return a logged-in connection to the pool.
+        
+        Args:
+            key: (host, port, user) tuple
+            conn: FTPConnection that is still connected and logged in
+        """
+        with self._lock:
+            timer = self._schedule_ping(key, conn)
+            self._idle.setdefault(key, []).append([conn, time.monotonic(), timer])
+            self._start_sweeper()
+    
+    def sweep(self):
+        """
+        Close connections that have been idle longer than idle_timeout.
+        
+        Returns:
+            int: Number of connections closed
+        """
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = []
+        
+        with self._lock:
+            for key in list(self._idle):
+                keep = []
+                
+                for entry in self._idle[key]:
+                    if entry[1] < cutoff:
+                        expired.append(entry)
+                    else:
+                        keep.append(entry)
+                
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    del self._idle[key]
+        
+        # Close outside the lock - no need to block other threads on socket I/O
+        for conn, _, timer in expired:
+            timer.cancel()
+            conn.close()
+        
+        return len(expired)
+    
+    def clear(self):
+        """Close every pooled connection."""
+        with self._lock:
+            entries = [entry for entries in self._idle.values() for entry in entries]
+            self._idle.clear()
+        
+        for conn, _, timer in entries:
+            timer.cancel()
+            conn.close()
+    
+    def _start_sweeper(self):
+        """
+        Start the sweeper thread if it isn't running (call with the lock held).
+        
+        Started lazily - no thread until something is pooled.
+        """
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(target=self._sweep_loop, daemon=True)
+            self._sweeper.start()
+    
+    def _schedule_ping(self, key, conn):
+        """Start the keep-alive timer for one idle connection."""
+        timer = threading.Timer(self.keepalive_interval, self._ping, args=(key, conn))
+        timer.daemon = True
+        timer.start()
+        return timer
+    
+    def _ping(self, key, conn):
+        """
+        Keep-alive timer callback: send NOOP on an idle connection.
+        
+        The entry is taken out of the pool first, so it can't be checked
+        out halfway through the exchange, and the NOOP round trip runs
+        without the pool lock - a slow server must not hold up get()/put()
+        for every other host. A connection that doesn't answer 200 is
+        closed instead of going back.
+        """
+        with self._lock:
+            entries = self._idle.get(key, [])
+            entry = next((e for e in entries if e[0] is conn), None)
+            
+            if entry is None:
+                # Already checked out or swept
+                return
+            
+            entries.remove(entry)
+            if not entries:
+                del self._idle[key]
+        
+        try:
+            alive = conn.send_command("NOOP").startswith('200')
+        except OSError:
+            alive = False
+        
+        if not alive:
+            conn.close()
+            return
+        
+        with self._lock:
+            # Keep released_at as is - pinging doesn't count as being used
+            entry[2] = self._schedule_ping(key, conn)
+            self._idle.setdefault(key, []).append(entry)
+            
+            # The pool may have emptied during the ping, ending the sweeper
+            self._start_sweeper()
+    
+    def _sweep_loop(self):
+        """
+        Background thread: periodically drop expired connections.
+        Exits once the pool is empty (put() restarts it when needed).
+        """
+        while True:
+            time.sleep(self.idle_timeout / 2)
+            self.sweep()
+            
+            with self._lock:
+                if not self._idle:
+                    self._sweeper = None
+                    return
+
+
+# One pool shared by every FTPClient in this process
+connection_pool = ConnectionPool()
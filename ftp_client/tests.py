@@ -1,3 +1,81 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .services.connection import FTPConnection
+
+
+class FakeSocket:
+    """
+    Stands in for a connected socket: each recv_into() hands out the next
+    of the given chunks, then b"" (connection closed).
+    """
+    
+    def __init__(self, *chunks):
+        self.chunks = list(chunks)
+    
+    def recv_into(self, view):
+        if not self.chunks:
+            return 0
+        
+        chunk = self.chunks.pop(0)
+        view[:len(chunk)] = chunk
+        return len(chunk)
+
+
+class ReadResponseTests(SimpleTestCase):
+    """FTPConnection._read_response() against the RFC 959 reply grammar."""
+    
+    def make_connection(self, *chunks):
+        conn = FTPConnection("localhost")
+        conn.sock = FakeSocket(*chunks)
+        return conn
+    
+    def test_single_line(self):
+        conn = self.make_connection(b"230 Login successful\r\n")
+        
+        self.assertEqual(conn._read_response(), "230 Login successful\r\n")
+        self.assertEqual(conn.last_line, "230 Login successful")
+    
+    def test_multiline(self):
+        conn = self.make_connection(b"123-First line\r\n text\r\n123 End\r\n")
+        
+        self.assertEqual(conn._read_response(), "123-First line\r\n text\r\n123 End\r\n")
+        self.assertEqual(conn.last_line, "123 End")
+    
+    def test_reply_split_across_recvs(self):
+        conn = self.make_connection(b"21", b"1-Features:\r\n EP", b"SV\r\n211", b" End\r\n")
+        
+        self.assertEqual(conn._read_response(), "211-Features:\r\n EPSV\r\n211 End\r\n")
+        self.assertEqual(conn.last_line, "211 End")
+    
+    def test_single_line_split_across_recvs(self):
+        conn = self.make_connection(b"220 Wel", b"come\r\n")
+        
+        self.assertEqual(conn._read_response(), "220 Welcome\r\n")
+        self.assertEqual(conn.last_line, "220 Welcome")
+    
+    def test_two_replies_in_one_recv(self):
+        # Pipelined commands: both replies arrive together
+        conn = self.make_connection(b"331 Need password\r\n230 Logged in\r\n")
+        
+        self.assertEqual(conn._read_response(), "331 Need password\r\n")
+        self.assertEqual(conn._read_response(), "230 Logged in\r\n")
+        self.assertEqual(conn.last_line, "230 Logged in")
+        
+        # Nothing was left over
+        self.assertEqual(conn._read_response(), "")
+    
+    def test_continuation_with_other_code(self):
+        # Only "211 " ends a reply opened with "211-"
+        conn = self.make_connection(b"211-Status\r\n200 not the end\r\n211-nor this\r\n211 End\r\n")
+        
+        self.assertEqual(
+            conn._read_response(),
+            "211-Status\r\n200 not the end\r\n211-nor this\r\n211 End\r\n",
+        )
+        self.assertEqual(conn.last_line, "211 End")
+    
+    def test_connection_closed_mid_reply(self):
+        conn = self.make_connection(b"211-Status\r\n partial\r\n")
+        
+        self.assertEqual(conn._read_response(), "211-Status\r\n partial\r\n")
+        self.assertEqual(conn.last_line, " partial")
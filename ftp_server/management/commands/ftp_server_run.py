@@ -1,3 +1,7 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
 from django.core.management.base import BaseCommand
 from ftp_server.services.server_core import FTPServer
 
@@ -9,11 +13,35 @@ class Command(BaseCommand):
         parser.add_argument("--host", type=str, default="127.0.0.1")
         parser.add_argument("--port", type=int, default=2121)
         parser.add_argument("--root", type=str, default="server_storage")
+        parser.add_argument(
+            "--reuse-port",
+            action="store_true",
+            help="Set SO_REUSEPORT so several server processes can share the port",
+        )
 
     def handle(self, *args, **options):
         host = options["host"]
         port = options["port"]
         root_dir = options["root"]
 
-        server = FTPServer(host=host, port=port, root_dir=root_dir)
-        server.start()
+        log = logging.getLogger("ftp_server")
+
+        # -v 2 shows every command and reply
+        if options["verbosity"] > 1:
+            log.setLevel(logging.DEBUG)
+
+        # Server threads only put records on a queue; a listener thread
+        # does the actual writing, so a slow console never stalls a reply
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *log.handlers, respect_handler_level=True)
+        log.handlers = [QueueHandler(log_queue)]
+        listener.start()
+
+        server = FTPServer(host=host, port=port, root_dir=root_dir, reuse_port=options["reuse_port"])
+        self.stdout.write(f"FTP server running on {host}:{port}, serving {root_dir}")
+
+        try:
+            server.start()
+        finally:
+            # Flush whatever is still queued
+            listener.stop()
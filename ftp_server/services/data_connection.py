@@ -1,6 +1,78 @@
+import os
+import mmap
 import socket
 import threading
 import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bytes moved per recv() on data connections
+DATA_CHUNK = 262144
+
+# Without sendfile(2), files at least this big are memory-mapped for RETR;
+# below it, mapping costs more than simply reading the file
+MMAP_THRESHOLD = 65536
+
+# Seconds a data connection may sit idle - waiting for the client to
+# connect, or for it to send/accept the next bytes - before it is given up.
+# Transfers run on a small thread pool; without a limit, clients that never
+# connect (or stall) would tie up every worker
+DATA_TIMEOUT = 30
+
+# Kernel socket buffer size for data connections - a bigger buffer lets
+# TCP keep more data in flight (bigger window) on bulk transfers
+DATA_SOCKET_BUFFER = 1 << 20
+
+
+class BufferPool:
+    """
+    Hands out reusable fixed-size receive buffers ("slabs").
+    
+    recv(8192) creates a new bytes object for every chunk. With a slab,
+    recv_into() writes straight into memory we already own, and giving
+    the slab back after the transfer means the next transfer (on any
+    session) doesn't allocate one either.
+    """
+    
+    def __init__(self, slab_size=DATA_CHUNK, max_free=32):
+        """
+        Args:
+            slab_size: Size of each buffer in bytes
+            max_free: How many idle buffers to keep around at most
+        """
+        self.slab_size = slab_size
+        self.max_free = max_free
+        self._free = []
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """
+        Get a buffer - a pooled one if available, otherwise a new one.
+        
+        Returns:
+            bytearray: Buffer of slab_size bytes
+        """
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        
+        return bytearray(self.slab_size)
+    
+    def release(self, slab):
+        """
+        Return a buffer to the pool (dropped if the pool is already full).
+        
+        Args:
+            slab: Buffer previously returned by acquire()
+        """
+        with self._lock:
+            if len(self._free) < self.max_free:
+                self._free.append(slab)
+
+
+# Shared by every session's data connections
+buffer_pool = BufferPool()
 
 
 class PassiveModeManager:
@@ -40,6 +112,10 @@ class PassiveModeManager:
         self.listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         
+        # Set before listen() - accepted sockets inherit them on most systems,
+        # and the TCP window scale is agreed during the handshake
+        self._set_buffer_sizes(self.listen_socket)
+        
         # Bind to a random available port (0 = let OS choose)
         # Use same host as control connection
         self.listen_socket.bind((server_host, 0))
@@ -50,11 +126,11 @@ class PassiveModeManager:
         # Listen for ONE connection
         self.listen_socket.listen(1)
         
-        print(f"  [PASV] Listening on {host}:{port}")
+        logger.debug("PASV listening on %s:%s", host, port)
         
         return host, port
     
-    def accept_data_connection(self, timeout=30):
+    def accept_data_connection(self, timeout=DATA_TIMEOUT):
         """
         Wait for client to connect to our passive mode socket.
         
@@ -70,18 +146,41 @@ class PassiveModeManager:
         # Set timeout so we don't wait forever
         self.listen_socket.settimeout(timeout)
         
-        print(f"  [PASV] Waiting for client to connect...")
+        logger.debug("PASV waiting for client to connect...")
         
         try:
             # Accept the connection
             self.data_socket, client_addr = self.listen_socket.accept()
-            print(f"  [PASV] Client connected from {client_addr}")
+            
+            # The accepted socket doesn't inherit the listener's timeout -
+            # a client that stalls mid-transfer must not block forever
+            self.data_socket.settimeout(timeout)
+            
+            # Not every platform passes the listener's buffer sizes on
+            self._set_buffer_sizes(self.data_socket)
+            
+            # The last segment of a transfer is usually less than full size;
+            # with Nagle on it can sit waiting for the client's delayed ACK
+            self.data_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            
+            logger.debug("PASV client connected from %s", client_addr)
             
             return self.data_socket
             
         except socket.timeout:
             raise TimeoutError(f"Client did not connect within {timeout} seconds")
     
+    @staticmethod
+    def _set_buffer_sizes(sock):
+        """
+        Give a data socket large kernel send/receive buffers.
+        
+        Args:
+            sock: Socket to configure
+        """
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, DATA_SOCKET_BUFFER)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, DATA_SOCKET_BUFFER)
+    
     def send_data(self, data):
         """
         Send data through the data connection.
@@ -95,39 +194,82 @@ class PassiveModeManager:
         if not self.data_socket:
             raise Exception("No data connection established")
         
-        total_sent = 0
+        # One sendall() - it loops in C until everything is out
+        # (the old send() loop also ignored partial sends)
+        self.data_socket.sendall(data)
         
-        # Send in chunks
-        chunk_size = 8192
-        for i in range(0, len(data), chunk_size):
-            chunk = data[i:i+chunk_size]
-            sent = self.data_socket.send(chunk)
-            total_sent += sent
-        
-        return total_sent
+        return len(data)
     
-    def receive_data(self):
+    def send_file(self, fp):
         """
-        Receive all data from the data connection.
+        Send an open file through the data connection.
+        
+        socket.sendfile() uses the sendfile(2) syscall where available, so
+        the kernel copies straight from the page cache to the socket - the
+        file never passes through Python.
+        
+        Args:
+            fp: File object opened in binary mode
         
         Returns:
-            bytes: Received data
+            int: Number of bytes sent
         """
         if not self.data_socket:
             raise Exception("No data connection established")
         
-        data = b''
+        if hasattr(os, "sendfile"):
+            return self.data_socket.sendfile(fp, offset=0)
         
-        while True:
-            chunk = self.data_socket.recv(8192)
-            
-            if not chunk:
-                # Client closed connection = transfer complete
-                break
-            
-            data += chunk
+        # No sendfile(2) here (e.g. Windows): socket.sendfile() would fall
+        # back to 8 KB read()/send() rounds. Hand the whole file to one
+        # sendall() instead - small files read, large ones memory-mapped so
+        # pages are faulted in from the page cache as they're sent
+        size = os.fstat(fp.fileno()).st_size
+        
+        if size < MMAP_THRESHOLD:
+            data = fp.read()
+            self.data_socket.sendall(data)
+            return len(data)
+        
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            self.data_socket.sendall(mm)
+        
+        return size
+    
+    def receive_chunks(self):
+        """
+        Yield data from the data connection as it arrives.
+        
+        Chunks are received into a pooled buffer, so nothing is allocated
+        per chunk and the caller can write each one out (to disk) before
+        the next arrives - memory use stays at one buffer no matter how
+        big the upload is.
+        
+        Each chunk is a memoryview into that buffer and is only valid
+        until the next one is requested.
+        
+        Yields:
+            memoryview: Received bytes
+        """
+        if not self.data_socket:
+            raise Exception("No data connection established")
+        
+        slab = buffer_pool.acquire()
+        view = memoryview(slab)
+        
+        try:
+            while True:
+                n = self.data_socket.recv_into(view)
+                
+                if not n:
+                    # Client closed connection = transfer complete
+                    break
+                
+                yield view[:n]
         
-        return data
+        finally:
+            view.release()
+            buffer_pool.release(slab)
     
     def close(self):
         """
@@ -147,4 +289,4 @@ class PassiveModeManager:
                 pass
             self.listen_socket = None
         
-        print(f"  [PASV] Data connection closed")
+        logger.debug("PASV data connection closed")
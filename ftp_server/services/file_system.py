@@ -1,6 +1,146 @@
 import os
 import time
 import stat
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ListingCache:
+    """
+    Remembers recent LIST output per directory.
+    
+    Clients tend to LIST the same directory over and over (after every
+    upload, refresh, CWD...). Each entry is stored with the directory's
+    mtime: creating, deleting or renaming anything inside a directory
+    changes it, so a changed mtime means the cached listing is stale.
+    
+    Overwriting a file's contents doesn't touch the directory mtime,
+    which is why entries also expire after ttl seconds and why the
+    write helpers below invalidate the parent directory explicitly.
+    """
+    
+    def __init__(self, maxsize=1024, ttl=2.0):
+        """
+        Args:
+            maxsize: How many directories to remember at most
+            ttl: Seconds a listing may be served from the cache
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        
+        # real_path -> (dir_mtime_ns, expires_at, listing)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, real_path, mtime_ns):
+        """
+        Look up a listing.
+        
+        Args:
+            real_path: Absolute directory path
+            mtime_ns: Directory's current st_mtime_ns
+        
+        Returns:
+            bytes: Cached listing, or None if missing or stale
+        """
+        with self._lock:
+            entry = self._entries.get(real_path)
+            
+            if entry is None:
+                return None
+            
+            if entry[0] != mtime_ns or entry[1] < time.monotonic():
+                del self._entries[real_path]
+                return None
+            
+            # Mark as most recently used
+            self._entries.move_to_end(real_path)
+            return entry[2]
+    
+    def put(self, real_path, mtime_ns, listing):
+        """
+        Store a listing, evicting the least recently used one if full.
+        
+        Args:
+            real_path: Absolute directory path
+            mtime_ns: Directory's st_mtime_ns when the listing was built
+            listing: Encoded listing
+        """
+        with self._lock:
+            self._entries[real_path] = (mtime_ns, time.monotonic() + self.ttl, listing)
+            self._entries.move_to_end(real_path)
+            
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, real_path):
+        """
+        Forget the listing of one directory.
+        
+        Args:
+            real_path: Absolute directory path
+        """
+        with self._lock:
+            self._entries.pop(real_path, None)
+
+
+# Shared by every session
+listing_cache = ListingCache()
+
+
+@lru_cache(maxsize=1024)
+def _format_mtime(mtime):
+    """
+    Format a whole-second timestamp the way LIST shows it.
+    
+    Files in one directory often share a modification time (copied or
+    extracted together), so the same timestamp is formatted only once.
+    
+    Args:
+        mtime: Modification time in whole seconds since the epoch
+    
+    Returns:
+        str: e.g. "Feb 12 18:42"
+    """
+    return time.strftime("%b %d %H:%M", time.localtime(mtime))
+
+
+# Directories with more entries than this are stat()ed by several threads
+PARALLEL_STAT_THRESHOLD = 64
+
+# Threads used for that - stat() releases the GIL, so on a network mount
+# (NFS/SMB/FUSE) their round trips overlap instead of queuing
+STAT_WORKERS = 8
+
+# Threads are only started the first time a big directory is listed
+_stat_pool = ThreadPoolExecutor(max_workers=STAT_WORKERS, thread_name_prefix="ftp-stat")
+
+
+def _stat_entries(entries):
+    """
+    stat() a list of directory entries, skipping any that fail.
+    
+    Args:
+        entries: os.DirEntry objects
+    
+    Returns:
+        list: (entry, os.stat_result) pairs, in the same order
+    """
+    results = []
+    
+    for entry in entries:
+        try:
+            results.append((entry, entry.stat()))
+        except Exception as e:
+            # If we can't stat a file, skip it
+            logger.warning("Cannot stat %s: %s", entry.name, e)
+    
+    return results
 
 
 class FileSystemHelper:
@@ -18,106 +158,140 @@ class FileSystemHelper:
             real_path: Absolute filesystem path
             
         Returns:
-            str: Directory listing in ls -l format
+            bytes: Directory listing in ls -l format, UTF-8 encoded
+                   and ready to send
         """
-        if not os.path.exists(real_path):
+        # One stat answers "exists?", "is it a directory?" and "changed?"
+        try:
+            dir_stats = os.stat(real_path)
+        except FileNotFoundError:
             raise FileNotFoundError(f"Directory not found: {real_path}")
         
-        if not os.path.isdir(real_path):
+        if not stat.S_ISDIR(dir_stats.st_mode):
             raise NotADirectoryError(f"Not a directory: {real_path}")
         
+        # Serve from the cache while the directory is unchanged
+        mtime_ns = dir_stats.st_mtime_ns
+        listing = listing_cache.get(real_path, mtime_ns)
+        
+        if listing is not None:
+            return listing
+        
         lines = []
+        append = lines.append
+        
+        # Format: drwxr-xr-x  1 owner group size month day time name
+        # Permissions, links, owner and group are the same on every line
+        # of a kind, so that part is formatted once up front
+        columns = "%3d %-8s %-8s " % (1, "ftp", "ftp")
+        dir_prefix = "drwxr-xr-x " + columns
+        file_prefix = "-rw-r--r-- " + columns
+        
+        # Local names - looked up once instead of per entry
+        fmt_mtime = _format_mtime
+        is_dir = stat.S_ISDIR
         
         try:
-            # List all files and directories
-            entries = os.listdir(real_path)
+            # scandir() returns entries with their names from one directory
+            # read - no listdir() + os.path.join() per entry
+            with os.scandir(real_path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+            
+            # One stat per entry; the file type comes from st_mode
+            # instead of a separate isdir() call
+            if len(entries) > PARALLEL_STAT_THRESHOLD:
+                # One task per worker (not per entry) keeps the hand-off
+                # cost down when the disk is local and stat() is cheap
+                step = -(-len(entries) // STAT_WORKERS)
+                parts = [entries[i:i + step] for i in range(0, len(entries), step)]
+                stat_results = [pair for part in _stat_pool.map(_stat_entries, parts) for pair in part]
+            else:
+                stat_results = _stat_entries(entries)
             
-            for entry in sorted(entries):
-                entry_path = os.path.join(real_path, entry)
+            for entry, stats in stat_results:
+                time_str = fmt_mtime(int(stats.st_mtime))
                 
-                try:
-                    # Get file stats
-                    stats = os.stat(entry_path)
-                    
-                    # Format: drwxr-xr-x  1 owner group size month day time name
-                    
-                    # File type and permissions
-                    if os.path.isdir(entry_path):
-                        perms = 'drwxr-xr-x'
-                        size = 0
-                    else:
-                        perms = '-rw-r--r--'
-                        size = stats.st_size
-                    
-                    # Number of links (always 1 for simplicity)
-                    links = 1
-                    
-                    # Owner and group (just use "ftp" for both)
-                    owner = "ftp"
-                    group = "ftp"
-                    
-                    # File size
-                    size_str = str(size)
-                    
-                    # Modification time
-                    mtime = time.localtime(stats.st_mtime)
-                    time_str = time.strftime("%b %d %H:%M", mtime)
-                    
-                    # Full line
-                    line = f"{perms} {links:3} {owner:8} {group:8} {size_str:>12} {time_str} {entry}"
-                    lines.append(line)
-                    
-                except Exception as e:
-                    # If we can't stat a file, skip it
-                    print(f"  [WARNING] Cannot stat {entry}: {e}")
-                    continue
+                # Directories are listed with size 0
+                if is_dir(stats.st_mode):
+                    append("%s%12d %s %s" % (dir_prefix, 0, time_str, entry.name))
+                else:
+                    append("%s%12d %s %s" % (file_prefix, stats.st_size, time_str, entry.name))
             
         except PermissionError:
             raise PermissionError(f"Permission denied: {real_path}")
         
-        return "\r\n".join(lines) + "\r\n" if lines else ""
+        # The empty last item gives the final line its CRLF without copying
+        # the whole text again for a "+ '\r\n'"; encoded once here, so a
+        # cached listing goes out with no per-LIST work at all
+        if lines:
+            append("")
+        
+        listing = "\r\n".join(lines).encode("utf-8")
+        listing_cache.put(real_path, mtime_ns, listing)
+        
+        return listing
     
     @staticmethod
-    def read_file(real_path):
+    def open_file(real_path):
         """
-        Read a file from disk.
+        Open a file for sending without reading it into memory.
         
         Args:
             real_path: Absolute filesystem path
-            
+        
         Returns:
-            bytes: File contents
+            file: File opened in binary read mode (caller closes it)
         """
-        if not os.path.exists(real_path):
-            raise FileNotFoundError(f"File not found: {real_path}")
-        
-        if not os.path.isfile(real_path):
-            raise IsADirectoryError(f"Is a directory: {real_path}")
-        
-        with open(real_path, 'rb') as f:
-            return f.read()
+        # open() itself raises FileNotFoundError / IsADirectoryError, so
+        # checking first would only cost extra stat() calls
+        return open(real_path, 'rb')
     
     @staticmethod
-    def write_file(real_path, data):
+    def write_file(real_path, chunks):
         """
-        Write a file to disk.
+        Write a file to disk chunk by chunk.
+        
+        Each chunk is written as soon as it is produced, so the whole
+        file never has to be in memory at once.
         
         Args:
             real_path: Absolute filesystem path
-            data: bytes to write
+            chunks: Iterable of bytes-like objects (e.g. receive_chunks())
             
         Returns:
             int: Number of bytes written
         """
-        # Create parent directory if it doesn't exist
         parent_dir = os.path.dirname(real_path)
-        if not os.path.exists(parent_dir):
+        
+        # Raw file descriptor instead of open(): chunks are already large,
+        # so a buffered file object would only add a copy per chunk
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+        
+        try:
+            fd = os.open(real_path, flags, 0o644)
+        except FileNotFoundError:
+            # Parent directory doesn't exist yet - create it and retry
             os.makedirs(parent_dir, exist_ok=True)
+            fd = os.open(real_path, flags, 0o644)
+        
+        written = 0
+        
+        try:
+            for chunk in chunks:
+                written += len(chunk)
+                
+                # os.write() may write less than asked - loop until done
+                chunk = memoryview(chunk)
+                while chunk:
+                    chunk = chunk[os.write(fd, chunk):]
+        
+        finally:
+            os.close(fd)
         
-        with open(real_path, 'wb') as f:
-            f.write(data)
+        # The file's size and date in the parent's listing just changed
+        listing_cache.invalidate(parent_dir)
         
-        return len(data)
+        return written
     
     @staticmethod
     def delete_file(real_path):
@@ -127,13 +301,17 @@ class FileSystemHelper:
         Args:
             real_path: Absolute filesystem path
         """
-        if not os.path.exists(real_path):
-            raise FileNotFoundError(f"File not found: {real_path}")
-        
-        if not os.path.isfile(real_path):
-            raise IsADirectoryError(f"Is a directory, not a file: {real_path}")
+        # os.remove() raises FileNotFoundError on its own. For a directory
+        # Linux raises IsADirectoryError, but macOS/BSD raise PermissionError
+        # (EPERM) - only on that error path do we stat to tell them apart
+        try:
+            os.remove(real_path)
+        except PermissionError:
+            if os.path.isdir(real_path):
+                raise IsADirectoryError(f"Is a directory: {real_path}")
+            raise
         
-        os.remove(real_path)
+        listing_cache.invalidate(os.path.dirname(real_path))
     
     @staticmethod
     def make_directory(real_path):
@@ -143,10 +321,9 @@ class FileSystemHelper:
         Args:
             real_path: Absolute filesystem path
         """
-        if os.path.exists(real_path):
-            raise FileExistsError(f"Directory already exists: {real_path}")
-        
+        # Raises FileExistsError if the path is already taken
         os.makedirs(real_path, exist_ok=False)
+        listing_cache.invalidate(os.path.dirname(real_path))
     
     @staticmethod
     def remove_directory(real_path):
@@ -156,16 +333,12 @@ class FileSystemHelper:
         Args:
             real_path: Absolute filesystem path
         """
-        if not os.path.exists(real_path):
-            raise FileNotFoundError(f"Directory not found: {real_path}")
-        
-        if not os.path.isdir(real_path):
-            raise NotADirectoryError(f"Not a directory: {real_path}")
-        
-        if os.listdir(real_path):
-            raise OSError(f"Directory not empty: {real_path}")
-        
+        # os.rmdir() raises FileNotFoundError, NotADirectoryError, or
+        # OSError (ENOTEMPTY) for a non-empty directory - no need to
+        # check any of that first
         os.rmdir(real_path)
+        listing_cache.invalidate(real_path)
+        listing_cache.invalidate(os.path.dirname(real_path))
     
     @staticmethod
     def rename(old_path, new_path):
@@ -176,13 +349,18 @@ class FileSystemHelper:
             old_path: Current path
             new_path: New path
         """
-        if not os.path.exists(old_path):
-            raise FileNotFoundError(f"Source not found: {old_path}")
+        # Source first, so a vanished source is reported as such even when
+        # the destination is taken too. lstat() raises FileNotFoundError
+        # itself - no separate exists() check needed
+        os.lstat(old_path)
         
+        # os.rename() would silently replace an existing file on Unix
         if os.path.exists(new_path):
             raise FileExistsError(f"Destination already exists: {new_path}")
         
         os.rename(old_path, new_path)
+        listing_cache.invalidate(os.path.dirname(old_path))
+        listing_cache.invalidate(os.path.dirname(new_path))
     
     @staticmethod
     def get_file_size(real_path):
@@ -195,13 +373,13 @@ class FileSystemHelper:
         Returns:
             int: File size in bytes
         """
-        if not os.path.exists(real_path):
-            raise FileNotFoundError(f"File not found: {real_path}")
+        # One stat (raises FileNotFoundError) gives both type and size
+        stats = os.stat(real_path)
         
-        if not os.path.isfile(real_path):
+        if not stat.S_ISREG(stats.st_mode):
             raise IsADirectoryError(f"Is a directory: {real_path}")
         
-        return os.path.getsize(real_path)
+        return stats.st_size
     
     @staticmethod
     def get_modification_time(real_path):
@@ -214,10 +392,8 @@ class FileSystemHelper:
         Returns:
             str: Modification time in YYYYMMDDHHMMSS format
         """
-        if not os.path.exists(real_path):
-            raise FileNotFoundError(f"File not found: {real_path}")
-        
-        mtime = os.path.getmtime(real_path)
+        # Raises FileNotFoundError if missing
+        mtime = os.stat(real_path).st_mtime
         time_struct = time.gmtime(mtime)
         
         # Format: YYYYMMDDHHMMSS
@@ -1,18 +1,140 @@
+import logging
+import os
+import queue
 import socket
+import selectors
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import wraps
+from os.path import normpath
+from stat import S_ISDIR
 from .session import FTPSession
-from .data_connection import PassiveModeManager
+from .data_connection import DATA_TIMEOUT, PassiveModeManager
 from .file_system import FileSystemHelper
 
+logger = logging.getLogger(__name__)
+
+# Fixed replies, encoded once at import instead of on every send
+_R_WELCOME = b"220 Welcome to Django FTP Server\r\n"
+_R_USER_OK = b"331 Username OK, need password\r\n"
+_R_LOGGED_IN = b"230 Login successful\r\n"
+_R_SYST = b"215 UNIX Type: L8\r\n"
+_R_OK = b"200 OK\r\n"
+_R_CWD_OK = b"250 Directory changed successfully\r\n"
+_R_CDUP_OK = b"200 Directory changed to parent\r\n"
+_R_BAD_TYPE = b"504 Unsupported TYPE\r\n"
+_R_LIST_START = b"150 Opening data connection for directory listing\r\n"
+_R_LIST_DONE = b"226 Directory listing sent\r\n"
+_R_TRANSFER_DONE = b"226 Transfer complete\r\n"
+_R_RNFR_OK = b"350 Ready for RNTO\r\n"
+_R_NEED_RNFR = b"503 RNFR required first\r\n"
+_R_RENAMED = b"250 Rename successful\r\n"
+_R_GOODBYE = b"221 Goodbye\r\n"
+_R_UNKNOWN = b"500 Unknown command\r\n"
+_R_TOO_LONG = b"500 Command line too long\r\n"
+_R_NOT_LOGGED_IN = b"530 Not logged in\r\n"
+_R_NO_PASV = b"425 Use PASV or EPSV first\r\n"
+_R_NO_DATA_CONN = b"425 Can't open data connection\r\n"
+_R_TRANSFER_ABORTED = b"426 Connection closed; transfer aborted\r\n"
+_R_NO_FILENAME = b"501 Missing filename\r\n"
+_R_NO_DIRNAME = b"501 Missing directory name\r\n"
+
+# Longest command line accepted; anything longer is a broken or hostile client
+MAX_CMD_LEN = 8192
+
+# Commands that run on the I/O pool instead of the selector thread
+_POOLED_COMMANDS = frozenset((b"LIST", b"RETR", b"STOR"))
+
+# Replies with one number in them, filled in with % at send time
+_R_EPSV = b"229 Entering Extended Passive Mode (|||%d|)\r\n"
+_R_SIZE = b"213 %d\r\n"
+_R_STOR_DONE = b"226 Transfer complete (%d bytes received)\r\n"
+
+# TYPE has only two valid answers
+_R_TYPE_SET = {
+    "A": b"200 Type set to A\r\n",
+    "I": b"200 Type set to I\r\n",
+}
+
+
+def requires_arg(missing_reply):
+    """
+    Decorator for cmd_* handlers that need an argument: sends
+    missing_reply (a 501) instead of running the handler without one.
+    """
+    def decorate(handler):
+        @wraps(handler)
+        def wrapper(self, session, argument):
+            if not argument:
+                self.send_raw(session, missing_reply)
+                return
+
+            return handler(self, session, argument)
+
+        return wrapper
+
+    return decorate
+
+
+def requires_auth(handler):
+    """
+    Decorator for handlers that need a logged-in session: sends 530
+    instead of running the handler.
+    """
+    @wraps(handler)
+    def wrapper(self, session, *args):
+        if not session.is_authenticated:
+            self.send_raw(session, _R_NOT_LOGGED_IN)
+            return
+
+        return handler(self, session, *args)
+
+    return wrapper
+
 
 class FTPServer:
 
 
-    def __init__(self, host="127.0.0.1", port=2121, root_dir="server_storage"):
+    def __init__(self, host="127.0.0.1", port=2121, root_dir="server_storage", reuse_port=False):
         self.host = host
         self.port = port
         self.root_dir = root_dir
         self.server_socket = None
 
+        # SO_REUSEPORT: let several server processes listen on the same
+        # port, with the kernel spreading new connections between them
+        self.reuse_port = reuse_port
+
+        # Encoded "227 Entering Passive Mode (h1,h2,h3,h4," for pasv_host
+        self.pasv_host = None
+        self.pasv_prefix = None
+
+        # Command name (bytes, as read off the socket) -> handler; one dict
+        # lookup per command instead of walking an if/elif chain
+        self.handlers = {
+            b"USER": self.cmd_user,
+            b"PASS": self.cmd_pass,
+            b"SYST": self.cmd_syst,
+            b"PWD": self.cmd_pwd,
+            b"CWD": self.cmd_cwd,
+            b"CDUP": self.cmd_cdup,
+            b"TYPE": self.cmd_type,
+            b"NOOP": self.cmd_noop,
+            b"PASV": self.cmd_pasv,
+            b"EPSV": self.cmd_epsv,
+            b"LIST": self.cmd_list,
+            b"RETR": self.cmd_retr,
+            b"STOR": self.cmd_stor,
+            b"DELE": self.cmd_dele,
+            b"MKD": self.cmd_mkd,
+            b"RMD": self.cmd_rmd,
+            b"RNFR": self.cmd_rnfr,
+            b"RNTO": self.cmd_rnto,
+            b"SIZE": self.cmd_size,
+            b"MDTM": self.cmd_mdtm,
+            b"QUIT": self.cmd_quit,
+        }
+
     def start(self):
         """
         Start listening for FTP clients.
@@ -20,33 +142,255 @@ class FTPServer:
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
+        # Not available on every platform (e.g. Windows)
+        if self.reuse_port and hasattr(socket, "SO_REUSEPORT"):
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
         self.server_socket.bind((self.host, self.port))
-        self.server_socket.listen(5)
+        # A backlog of 5 drops connections when several clients connect at
+        # once; let the kernel queue as many as it allows
+        self.server_socket.listen(socket.SOMAXCONN)
+
+        # One thread serves every client: the selector wakes us when the
+        # listening socket has a new connection or a client sent something,
+        # so a quiet client no longer holds up everyone else
+        self.server_socket.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.server_socket, selectors.EVENT_READ)
+
+        logger.info("FTP Server running on %s:%s", self.host, self.port)
+        logger.info("Root directory: %s", self.root_dir)
+
+        # LIST/RETR/STOR wait on the data connection and the disk, so they
+        # run on this pool; workers report back through the waker socket
+        self.io_pool = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4), thread_name_prefix="ftp-io")
+        self.finished = queue.SimpleQueue()
+        self.waker, self.waker_send = socket.socketpair()
+        self.waker.setblocking(False)
+        self.selector.register(self.waker, selectors.EVENT_READ, self.finished)
 
-        print("=" * 60)
-        print(f"🚀 FTP Server running on {self.host}:{self.port}")
-        print(f"📂 Root directory: {self.root_dir}")
-        print("=" * 60)
+        while True:
+            for key, events in self.selector.select():
+                if key.data is None:
+                    self.accept_client()
+                elif key.data is self.finished:
+                    self.resume_clients()
+                elif events & selectors.EVENT_WRITE:
+                    self.flush_client(key.data)
+                else:
+                    self.service_client(key.data)
 
+    def accept_client(self):
+        """
+        Accept every waiting client and register their control sockets
+        with the selector.
+        """
         while True:
-            client_sock, client_addr = self.server_socket.accept()
-            print(f"\n[+] Client connected: {client_addr}")
+            try:
+                client_sock, client_addr = self.server_socket.accept()
+            except BlockingIOError:
+                # Accept queue is empty
+                return
+
+            # Never block the selector thread: replies the client isn't
+            # reading yet are queued (see write_reply()), not waited on
+            client_sock.setblocking(False)
+
+            # Replies are small and each one is awaited by the client -
+            # don't let Nagle hold them back
+            client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            logger.info("Client connected: %s", client_addr)
 
             session = FTPSession(client_sock, client_addr, self.root_dir)
 
             try:
-                self.handle_client(session)
-            except Exception as e:
-                print(f"[!] Client error: {e}")
-            finally:
+                self.send_raw(session, _R_WELCOME)
+            except OSError as e:
+                logger.warning("Client error: %s", e)
                 session.cleanup()
-                print(f"[-] Client disconnected: {client_addr}")
+                continue
+
+            self.selector.register(client_sock, self.wanted_events(session), session)
+
+    def service_client(self, session: FTPSession):
+        """
+        Read what a client sent and run every complete command in it.
+        """
+        try:
+            try:
+                n = session.client_socket.recv_into(session.recv_view)
+            except BlockingIOError:
+                # Spurious wakeup - nothing to read after all
+                return
+
+            if not n:
+                self.drop_client(session)
+                return
+
+            session.command_buffer += session.recv_view[:n]
+            self.run_buffered(session)
+
+        except Exception as e:
+            logger.warning("Client error: %s", e)
+            self.drop_client(session)
+
+    def run_buffered(self, session: FTPSession):
+        """
+        Run the complete commands waiting in a session's buffer.
+
+        A transfer command is handed to the I/O pool and the session leaves
+        the selector until it is done - later commands stay buffered, so
+        replies still go out in order.
+        """
+        # A pipelining client sent several commands at once: cork the socket
+        # so their replies go out together instead of one packet each.
+        # Two newlines are enough to know - no need to count them all, and
+        # command_scanned already holds no newline
+        data = session.command_buffer
+        first = data.find(b"\n", session.command_scanned)
+
+        if first != -1 and data.find(b"\n", first + 1) != -1:
+            batch = session.cork()
+        else:
+            batch = nullcontext()
+
+        pooled = None
+
+        with batch:
+            while True:
+                # Replies are still queued - the client isn't reading them.
+                # Run nothing more until they are out, so the queue can't
+                # grow without bound; flush_client() picks up from here
+                if session.send_buffer:
+                    self.selector.modify(session.client_socket, selectors.EVENT_WRITE, session)
+                    return
+
+                command_line = self.next_command(session)
+
+                if command_line is None:
+                    return
+
+                if command_line.partition(b" ")[0].upper() in _POOLED_COMMANDS:
+                    pooled = command_line
+                    break
+
+                if not self.handle_command(session, command_line):
+                    self.drop_client(session)
+                    return
+
+        # Hand over only once the socket is uncorked - the worker's 150
+        # reply must not sit behind the cork, and the worker must not race
+        # this thread changing the socket's options
+        self.selector.unregister(session.client_socket)
+        self.io_pool.submit(self.run_pooled, session, pooled)
+
+    def run_pooled(self, session: FTPSession, command_line):
+        """
+        Runs one transfer command on an I/O pool thread.
+        """
+        # The session is off the selector, so nothing would flush queued
+        # replies - the client would wait for a 150 that never leaves while
+        # we wait for its data connection. Send synchronously instead, with
+        # a limit so a client that stops reading can't pin this worker
+        session.client_socket.settimeout(DATA_TIMEOUT)
+
+        try:
+            self.handle_command(session, command_line)
+            ok = True
+        except Exception as e:
+            logger.warning("Client error: %s", e)
+            ok = False
+
+        session.client_socket.setblocking(False)
+
+        # Hand the session back to the selector thread
+        self.finished.put((session, ok))
+        self.waker_send.send(b"\0")
+
+    def resume_clients(self):
+        """
+        Put sessions whose transfer finished back into the selector.
+        """
+        try:
+            self.waker.recv(4096)
+        except BlockingIOError:
+            pass
+
+        while True:
+            try:
+                session, ok = self.finished.get_nowait()
+            except queue.Empty:
+                return
+
+            if not ok:
+                self.close_client(session)
+                continue
+
+            self.selector.register(session.client_socket, selectors.EVENT_READ, session)
+
+            # Commands pipelined behind the transfer may already be buffered
+            try:
+                self.run_buffered(session)
+            except Exception as e:
+                logger.warning("Client error: %s", e)
+                self.drop_client(session)
+
+    def flush_client(self, session: FTPSession):
+        """
+        Send queued replies now that the client's socket is writable.
+        """
+        try:
+            try:
+                sent = session.client_socket.send(session.send_buffer)
+            except BlockingIOError:
+                return
+
+            del session.send_buffer[:sent]
+
+            if session.send_buffer:
+                return
+
+            # All out - read commands again, starting with any that were
+            # already buffered behind the queued replies
+            self.selector.modify(session.client_socket, selectors.EVENT_READ, session)
+            self.run_buffered(session)
+
+        except Exception as e:
+            logger.warning("Client error: %s", e)
+            self.drop_client(session)
+
+    @staticmethod
+    def wanted_events(session: FTPSession):
+        """
+        What to wait for on a client: writable while replies are queued,
+        readable otherwise.
+        """
+        return selectors.EVENT_WRITE if session.send_buffer else selectors.EVENT_READ
+
+    def drop_client(self, session: FTPSession):
+        """
+        Unregister a client from the selector and close its session.
+        """
+        self.selector.unregister(session.client_socket)
+        self.close_client(session)
+
+    def close_client(self, session: FTPSession):
+        """
+        Close a session that is not registered with the selector.
+        """
+        client_addr = session.client_address
+
+        session.cleanup()
+        logger.info("Client disconnected: %s", client_addr)
 
     def handle_client(self, session: FTPSession):
         """
-        Handles a single FTP client connection.
+        Handles a single FTP client connection with blocking reads.
+
+        start() multiplexes clients through the selector instead; this is
+        for serving one session on its own.
         """
-        self.send_response(session, "220 Welcome to Django FTP Server")
+        self.send_raw(session, _R_WELCOME)
 
         while True:
             command_line = self.recv_command(session)
@@ -54,174 +398,258 @@ class FTPServer:
             if not command_line:
                 break
 
-            print(f"[CLIENT] {command_line}")
-
-            parts = command_line.split(" ", 1)
-            command = parts[0].upper()
-            argument = parts[1] if len(parts) > 1 else None
-
-            if command == "USER":
-                session.username = argument
-                self.send_response(session, "331 Username OK, need password")
-
-            elif command == "PASS":
-                # For now accept any password
-                session.is_authenticated = True
-                self.send_response(session, "230 Login successful")
-
-            elif command == "SYST":
-                self.send_response(session, "215 UNIX Type: L8")
-
-            elif command == "PWD":
-                self.send_response(session, f'257 "{session.current_dir}" is the current directory')
-
-            elif command == "CWD":
-                if not argument:
-                    self.send_response(session, "501 Missing directory name")
-                    continue
-
-                try:
-                    real_path = session.get_real_path(argument)
-
-                    # Check if directory exists
-                    import os
-                    if os.path.isdir(real_path):
-                        session.set_current_dir(argument if argument.startswith("/") else session.current_dir + "/" + argument)
-                        self.send_response(session, "250 Directory changed successfully")
-                    else:
-                        self.send_response(session, "550 Directory not found")
-
-                except PermissionError:
-                    self.send_response(session, "550 Access denied")
-
-            elif command == "CDUP":
-                # Move one level up
-                import os
-                new_dir = os.path.normpath(session.current_dir + "/..").replace("\\", "/")
-                if not new_dir.startswith("/"):
-                    new_dir = "/" + new_dir
-
-                try:
-                    real_path = session.get_real_path(new_dir)
-                    if os.path.isdir(real_path):
-                        session.set_current_dir(new_dir)
-                        self.send_response(session, "200 Directory changed to parent")
-                    else:
-                        self.send_response(session, "550 Cannot go up")
-                except PermissionError:
-                    self.send_response(session, "550 Access denied")
-
-            elif command == "TYPE":
-                if argument not in ["A", "I"]:
-                    self.send_response(session, "504 Unsupported TYPE")
-                else:
-                    session.transfer_type = argument
-                    self.send_response(session, f"200 Type set to {argument}")
+            if not self.handle_command(session, command_line):
+                break
 
-            elif command == "NOOP":
-                self.send_response(session, "200 OK")
+    def handle_command(self, session: FTPSession, command_line):
+        """
+        Runs one FTP command line (raw bytes, line ending stripped).
 
-            elif command == "PASV":
-                self.handle_pasv(session)
+        Returns False once the client has sent QUIT, True otherwise.
+        """
+        # The per-command trace is DEBUG - don't pay for the decode unless it is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("<- %s", command_line.decode("utf-8", errors="ignore"))
 
-            elif command == "EPSV":
-                self.handle_epsv(session)
+        # The verb stays bytes - it is only ever a dict key. Only the
+        # argument (a path or name) is decoded, and only if there is one
+        verb, _, arg = command_line.partition(b" ")
+        argument = arg.decode("utf-8", errors="ignore") if arg else None
 
-            elif command == "LIST":
-                self.handle_list(session, argument or ".")
+        handler = self.handlers.get(verb.upper(), self.cmd_unknown)
 
-            elif command == "RETR":
-                if not argument:
-                    self.send_response(session, "501 Missing filename")
-                else:
-                    self.handle_retr(session, argument)
+        # Only QUIT returns False
+        return handler(session, argument) is not False
 
-            elif command == "STOR":
-                if not argument:
-                    self.send_response(session, "501 Missing filename")
-                else:
-                    self.handle_stor(session, argument)
+    def cmd_user(self, session: FTPSession, argument):
+        session.username = argument
+        self.send_raw(session, _R_USER_OK)
 
-            elif command == "DELE":
-                if not argument:
-                    self.send_response(session, "501 Missing filename")
-                else:
-                    self.handle_dele(session, argument)
+    def cmd_pass(self, session: FTPSession, argument):
+        # For now accept any password
+        session.is_authenticated = True
+        self.send_raw(session, _R_LOGGED_IN)
 
-            elif command == "MKD":
-                if not argument:
-                    self.send_response(session, "501 Missing directory name")
-                else:
-                    self.handle_mkd(session, argument)
+    def cmd_syst(self, session: FTPSession, argument):
+        self.send_raw(session, _R_SYST)
 
-            elif command == "RMD":
-                if not argument:
-                    self.send_response(session, "501 Missing directory name")
-                else:
-                    self.handle_rmd(session, argument)
+    def cmd_pwd(self, session: FTPSession, argument):
+        self.send_response(session, f'257 "{session.current_dir}" is the current directory')
 
-            elif command == "RNFR":
-                if not argument:
-                    self.send_response(session, "501 Missing filename")
-                else:
-                    # Store the source filename for RNTO
-                    session.rename_from = argument
-                    self.send_response(session, "350 Ready for RNTO")
-
-            elif command == "RNTO":
-                if not argument:
-                    self.send_response(session, "501 Missing filename")
-                elif not hasattr(session, 'rename_from') or not session.rename_from:
-                    self.send_response(session, "503 RNFR required first")
-                else:
-                    self.handle_rnto(session, session.rename_from, argument)
-                    session.rename_from = None
+    @requires_arg(_R_NO_DIRNAME)
+    def cmd_cwd(self, session: FTPSession, argument):
+        try:
+            real_path = session.get_real_path(argument)
 
-            elif command == "SIZE":
-                if not argument:
-                    self.send_response(session, "501 Missing filename")
-                else:
-                    self.handle_size(session, argument)
+            # One stat tells us both whether it exists and if it's a directory
+            st = os.stat(real_path)
 
-            elif command == "MDTM":
-                if not argument:
-                    self.send_response(session, "501 Missing filename")
-                else:
-                    self.handle_mdtm(session, argument)
+        except (FileNotFoundError, NotADirectoryError):
+            # Missing, or a file somewhere along the path
+            self.send_response(session, "550 Directory not found")
+            return
+        except PermissionError:
+            self.send_response(session, "550 Access denied")
+            return
+        except OSError:
+            # Name too long, symlink loop, ... - still no such directory
+            self.send_response(session, "550 Directory not found")
+            return
 
-            elif command == "QUIT":
-                self.send_response(session, "221 Goodbye")
-                break
+        if S_ISDIR(st.st_mode):
+            session.set_current_dir(argument if argument.startswith("/") else session.current_dir + "/" + argument)
+            self.send_raw(session, _R_CWD_OK)
+        else:
+            self.send_response(session, "550 Directory not found")
 
-            else:
-                self.send_response(session, "500 Unknown command")
+    def cmd_cdup(self, session: FTPSession, argument):
+        # Move one level up
+        new_dir = normpath(session.current_dir + "/..").replace("\\", "/")
+        if not new_dir.startswith("/"):
+            new_dir = "/" + new_dir
+
+        try:
+            real_path = session.get_real_path(new_dir)
+            st = os.stat(real_path)
+        except (FileNotFoundError, NotADirectoryError):
+            self.send_response(session, "550 Cannot go up")
+            return
+        except PermissionError:
+            self.send_response(session, "550 Access denied")
+            return
+        except OSError:
+            self.send_response(session, "550 Directory not found")
+            return
+
+        if S_ISDIR(st.st_mode):
+            session.set_current_dir(new_dir)
+            self.send_raw(session, _R_CDUP_OK)
+        else:
+            self.send_response(session, "550 Cannot go up")
+
+    def cmd_type(self, session: FTPSession, argument):
+        if argument not in ["A", "I"]:
+            self.send_raw(session, _R_BAD_TYPE)
+        else:
+            session.transfer_type = argument
+            self.send_raw(session, _R_TYPE_SET[argument])
+
+    def cmd_noop(self, session: FTPSession, argument):
+        self.send_raw(session, _R_OK)
+
+    def cmd_pasv(self, session: FTPSession, argument):
+        self.handle_pasv(session)
+
+    def cmd_epsv(self, session: FTPSession, argument):
+        self.handle_epsv(session)
+
+    def cmd_list(self, session: FTPSession, argument):
+        self.handle_list(session, argument or ".")
+
+    @requires_arg(_R_NO_FILENAME)
+    def cmd_retr(self, session: FTPSession, argument):
+        self.handle_retr(session, argument)
+
+    @requires_arg(_R_NO_FILENAME)
+    def cmd_stor(self, session: FTPSession, argument):
+        self.handle_stor(session, argument)
+
+    @requires_arg(_R_NO_FILENAME)
+    def cmd_dele(self, session: FTPSession, argument):
+        self.handle_dele(session, argument)
+
+    @requires_arg(_R_NO_DIRNAME)
+    def cmd_mkd(self, session: FTPSession, argument):
+        self.handle_mkd(session, argument)
+
+    @requires_arg(_R_NO_DIRNAME)
+    def cmd_rmd(self, session: FTPSession, argument):
+        self.handle_rmd(session, argument)
+
+    @requires_arg(_R_NO_FILENAME)
+    def cmd_rnfr(self, session: FTPSession, argument):
+        # Store the source filename for RNTO
+        session.rename_from = argument
+        self.send_raw(session, _R_RNFR_OK)
+
+    @requires_arg(_R_NO_FILENAME)
+    def cmd_rnto(self, session: FTPSession, argument):
+        if session.rename_from is None:
+            self.send_raw(session, _R_NEED_RNFR)
+        else:
+            self.handle_rnto(session, session.rename_from, argument)
+            session.rename_from = None
+
+    @requires_arg(_R_NO_FILENAME)
+    def cmd_size(self, session: FTPSession, argument):
+        self.handle_size(session, argument)
+
+    @requires_arg(_R_NO_FILENAME)
+    def cmd_mdtm(self, session: FTPSession, argument):
+        self.handle_mdtm(session, argument)
+
+    def cmd_quit(self, session: FTPSession, argument):
+        self.send_raw(session, _R_GOODBYE)
+        return False
+
+    def cmd_unknown(self, session: FTPSession, argument):
+        self.send_raw(session, _R_UNKNOWN)
 
     def send_response(self, session: FTPSession, message: str):
         """
         Sends a response with CRLF ending (required by FTP standard).
         """
         full_message = message + "\r\n"
-        session.client_socket.sendall(full_message.encode("utf-8"))
+        self.write_reply(session, full_message.encode("utf-8"))
+
+        logger.debug("-> %s", message)
+
+    def send_raw(self, session: FTPSession, raw: bytes):
+        """
+        Sends a pre-encoded response (CRLF included), e.g. one of the _R_* constants.
+        """
+        self.write_reply(session, raw)
 
-        print(f"[SERVER] {message}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("-> %s", raw[:-2].decode("ascii"))
+
+    def write_reply(self, session: FTPSession, data: bytes):
+        """
+        Puts an encoded reply on the control connection.
+
+        A non-blocking socket (the selector loop) takes what the kernel
+        will accept right now; the rest is queued in session.send_buffer
+        and sent by flush_client(). A client that stops reading can then
+        only hold up itself, never the loop. Blocking sockets - pool
+        workers (bounded by a timeout) and handle_client() - simply wait.
+        """
+        sock = session.client_socket
+
+        if sock.getblocking():
+            sock.sendall(data)
+            return
+
+        if session.send_buffer:
+            # Earlier replies are still waiting - keep the order
+            session.send_buffer += data
+            return
+
+        try:
+            sent = sock.send(data)
+        except BlockingIOError:
+            sent = 0
+
+        if sent < len(data):
+            session.send_buffer += data[sent:]
 
     def recv_command(self, session: FTPSession):
         """
-        Receives one FTP command line.
+        Receives one FTP command line as bytes (blocking).
+
+        Reads through a buffered file on the socket: readline() finds the
+        newline in C, and whatever a pipelining client sent after it stays
+        in the file's buffer for the next call.
         """
-        data = b""
+        if session.rfile is None:
+            session.rfile = session.client_socket.makefile("rb", buffering=4096)
 
-        while True:
-            chunk = session.client_socket.recv(1024)
-            if not chunk:
-                return None
+        line = session.rfile.readline(MAX_CMD_LEN)
 
-            data += chunk
+        if not line:
+            return None
 
-            if b"\n" in data:
-                break
+        if len(line) == MAX_CMD_LEN and not line.endswith(b"\n"):
+            self.send_raw(session, _R_TOO_LONG)
+            raise ValueError("Command line too long")
+
+        return line.strip()
+
+    def next_command(self, session: FTPSession):
+        """
+        Takes one complete command line out of the session's buffer.
 
-        return data.decode("utf-8", errors="ignore").strip()
+        Returns the line as bytes, or None if the buffer doesn't hold a
+        full line yet.
+        """
+        data = session.command_buffer
+
+        # Everything before command_scanned was searched on an earlier call -
+        # a line arriving in many small pieces is scanned only once
+        newline = data.find(b"\n", session.command_scanned)
+
+        if newline == -1:
+            if len(data) > MAX_CMD_LEN:
+                self.send_raw(session, _R_TOO_LONG)
+                raise ValueError("Command line too long")
+
+            session.command_scanned = len(data)
+            return None
+
+        line = bytes(data[:newline]).strip()
+        del data[:newline + 1]
+        session.command_scanned = 0
+
+        return line
 
     def handle_pasv(self, session: FTPSession):
         """
@@ -237,19 +665,18 @@ class FTPServer:
             # Store in session for later use
             session.passive_manager = pasv_mgr
             
-            # Calculate PASV response format: h1,h2,h3,h4,p1,p2
-            # IP address parts
-            h1, h2, h3, h4 = host.split('.')
+            # PASV response format: h1,h2,h3,h4,p1,p2
+            # The address part is the same for every PASV, so it is
+            # encoded once and only rebuilt if the listening address changes
+            if host != self.pasv_host:
+                self.pasv_prefix = f"227 Entering Passive Mode ({host.replace('.', ',')},".encode("ascii")
+                self.pasv_host = host
             
             # Port parts (port = p1*256 + p2)
-            p1 = port // 256
-            p2 = port % 256
-            
-            # Send response
-            self.send_response(session, f"227 Entering Passive Mode ({h1},{h2},{h3},{h4},{p1},{p2})")
+            self.send_raw(session, b"%s%d,%d)\r\n" % (self.pasv_prefix, port >> 8, port & 0xFF))
             
         except Exception as e:
-            print(f"[ERROR] PASV failed: {e}")
+            logger.error("PASV failed: %s", e)
             self.send_response(session, "425 Cannot open passive connection")
 
     def handle_epsv(self, session: FTPSession):
@@ -267,22 +694,19 @@ class FTPServer:
             session.passive_manager = pasv_mgr
             
             # EPSV response format: (|||port|)
-            self.send_response(session, f"229 Entering Extended Passive Mode (|||{port}|)")
+            self.send_raw(session, _R_EPSV % port)
             
         except Exception as e:
-            print(f"[ERROR] EPSV failed: {e}")
+            logger.error("EPSV failed: %s", e)
             self.send_response(session, "425 Cannot open passive connection")
 
+    @requires_auth
     def handle_list(self, session: FTPSession, path):
         """
         Handle LIST command - send directory listing.
         """
-        if not session.is_authenticated:
-            self.send_response(session, "530 Not logged in")
-            return
-        
-        if not hasattr(session, 'passive_manager') or not session.passive_manager:
-            self.send_response(session, "425 Use PASV or EPSV first")
+        if session.passive_manager is None:
+            self.send_raw(session, _R_NO_PASV)
             return
         
         try:
@@ -293,20 +717,22 @@ class FTPServer:
             listing = FileSystemHelper.list_directory(real_path)
             
             # Tell client we're about to send data
-            self.send_response(session, "150 Opening data connection for directory listing")
+            self.send_raw(session, _R_LIST_START)
             
             # Accept data connection
             session.passive_manager.accept_data_connection()
             
             # Send listing
-            session.passive_manager.send_data(listing.encode('utf-8'))
+            session.passive_manager.send_data(listing)
             
             # Close data connection
             session.passive_manager.close()
             
             # Tell client transfer is complete
-            self.send_response(session, "226 Directory listing sent")
+            self.send_raw(session, _R_LIST_DONE)
             
+        except TimeoutError:
+            self.abort_transfer(session)
         except FileNotFoundError:
             session.passive_manager.close()
             self.send_response(session, "550 Directory not found")
@@ -314,44 +740,44 @@ class FTPServer:
             session.passive_manager.close()
             self.send_response(session, "550 Permission denied")
         except Exception as e:
-            print(f"[ERROR] LIST failed: {e}")
+            logger.error("LIST failed: %s", e)
             session.passive_manager.close()
             self.send_response(session, "550 Failed to list directory")
 
+    @requires_auth
     def handle_retr(self, session: FTPSession, filename):
         """
         Handle RETR command - send file to client.
         """
-        if not session.is_authenticated:
-            self.send_response(session, "530 Not logged in")
-            return
-        
-        if not hasattr(session, 'passive_manager') or not session.passive_manager:
-            self.send_response(session, "425 Use PASV or EPSV first")
+        if session.passive_manager is None:
+            self.send_raw(session, _R_NO_PASV)
             return
         
         try:
             # Get real path
             real_path = session.get_real_path(filename)
             
-            # Read file
-            file_data = FileSystemHelper.read_file(real_path)
-            
-            # Tell client we're about to send data
-            self.send_response(session, f"150 Opening data connection for {filename} ({len(file_data)} bytes)")
-            
-            # Accept data connection
-            session.passive_manager.accept_data_connection()
-            
-            # Send file
-            session.passive_manager.send_data(file_data)
+            # Open file - it is sent straight from disk, not read into memory
+            with FileSystemHelper.open_file(real_path) as f:
+                file_size = os.fstat(f.fileno()).st_size
+                
+                # Tell client we're about to send data
+                self.send_response(session, f"150 Opening data connection for {filename} ({file_size} bytes)")
+                
+                # Accept data connection
+                session.passive_manager.accept_data_connection()
+                
+                # Send file
+                session.passive_manager.send_file(f)
             
             # Close data connection
             session.passive_manager.close()
             
             # Tell client transfer is complete
-            self.send_response(session, "226 Transfer complete")
+            self.send_raw(session, _R_TRANSFER_DONE)
             
+        except TimeoutError:
+            self.abort_transfer(session)
         except FileNotFoundError:
             session.passive_manager.close()
             self.send_response(session, "550 File not found")
@@ -362,20 +788,17 @@ class FTPServer:
             session.passive_manager.close()
             self.send_response(session, "550 Permission denied")
         except Exception as e:
-            print(f"[ERROR] RETR failed: {e}")
+            logger.error("RETR failed: %s", e)
             session.passive_manager.close()
             self.send_response(session, "550 Failed to retrieve file")
 
+    @requires_auth
     def handle_stor(self, session: FTPSession, filename):
         """
         Handle STOR command - receive file from client.
         """
-        if not session.is_authenticated:
-            self.send_response(session, "530 Not logged in")
-            return
-        
-        if not hasattr(session, 'passive_manager') or not session.passive_manager:
-            self.send_response(session, "425 Use PASV or EPSV first")
+        if session.passive_manager is None:
+            self.send_raw(session, _R_NO_PASV)
             return
         
         try:
@@ -388,34 +811,43 @@ class FTPServer:
             # Accept data connection
             session.passive_manager.accept_data_connection()
             
-            # Receive file data
-            file_data = session.passive_manager.receive_data()
-            
-            # Write file
-            bytes_written = FileSystemHelper.write_file(real_path, file_data)
+            # Write file as the data arrives
+            bytes_written = FileSystemHelper.write_file(real_path, session.passive_manager.receive_chunks())
             
             # Close data connection
             session.passive_manager.close()
             
             # Tell client transfer is complete
-            self.send_response(session, f"226 Transfer complete ({bytes_written} bytes received)")
+            self.send_raw(session, _R_STOR_DONE % bytes_written)
             
+        except TimeoutError:
+            self.abort_transfer(session)
         except PermissionError:
             session.passive_manager.close()
             self.send_response(session, "550 Permission denied")
         except Exception as e:
-            print(f"[ERROR] STOR failed: {e}")
+            logger.error("STOR failed: %s", e)
             session.passive_manager.close()
             self.send_response(session, "550 Failed to store file")
 
+    def abort_transfer(self, session: FTPSession):
+        """
+        Give up on a data connection that timed out.
+
+        Answers 425 if the client never connected, 426 if it connected
+        but then stalled mid-transfer.
+        """
+        connected = session.passive_manager.data_socket is not None
+        session.passive_manager.close()
+
+        logger.warning("Data connection timed out: %s", session.client_address)
+        self.send_raw(session, _R_TRANSFER_ABORTED if connected else _R_NO_DATA_CONN)
+
+    @requires_auth
     def handle_dele(self, session: FTPSession, filename):
         """
         Handle DELE command - delete file.
         """
-        if not session.is_authenticated:
-            self.send_response(session, "530 Not logged in")
-            return
-        
         try:
             real_path = session.get_real_path(filename)
             FileSystemHelper.delete_file(real_path)
@@ -428,17 +860,14 @@ class FTPServer:
         except PermissionError:
             self.send_response(session, "550 Permission denied")
         except Exception as e:
-            print(f"[ERROR] DELE failed: {e}")
+            logger.error("DELE failed: %s", e)
             self.send_response(session, "550 Failed to delete file")
 
+    @requires_auth
     def handle_mkd(self, session: FTPSession, dirname):
         """
         Handle MKD command - make directory.
         """
-        if not session.is_authenticated:
-            self.send_response(session, "530 Not logged in")
-            return
-        
         try:
             real_path = session.get_real_path(dirname)
             FileSystemHelper.make_directory(real_path)
@@ -449,17 +878,14 @@ class FTPServer:
         except PermissionError:
             self.send_response(session, "550 Permission denied")
         except Exception as e:
-            print(f"[ERROR] MKD failed: {e}")
+            logger.error("MKD failed: %s", e)
             self.send_response(session, "550 Failed to create directory")
 
+    @requires_auth
     def handle_rmd(self, session: FTPSession, dirname):
         """
         Handle RMD command - remove directory.
         """
-        if not session.is_authenticated:
-            self.send_response(session, "530 Not logged in")
-            return
-        
         try:
             real_path = session.get_real_path(dirname)
             FileSystemHelper.remove_directory(real_path)
@@ -474,22 +900,19 @@ class FTPServer:
         except PermissionError:
             self.send_response(session, "550 Permission denied")
         except Exception as e:
-            print(f"[ERROR] RMD failed: {e}")
+            logger.error("RMD failed: %s", e)
             self.send_response(session, "550 Failed to remove directory")
 
+    @requires_auth
     def handle_rnto(self, session: FTPSession, old_name, new_name):
         """
         Handle RNTO command - rename file (second part of rename).
         """
-        if not session.is_authenticated:
-            self.send_response(session, "530 Not logged in")
-            return
-        
         try:
             old_path = session.get_real_path(old_name)
             new_path = session.get_real_path(new_name)
             FileSystemHelper.rename(old_path, new_path)
-            self.send_response(session, "250 Rename successful")
+            self.send_raw(session, _R_RENAMED)
             
         except FileNotFoundError:
             self.send_response(session, "550 Source file not found")
@@ -498,38 +921,32 @@ class FTPServer:
         except PermissionError:
             self.send_response(session, "550 Permission denied")
         except Exception as e:
-            print(f"[ERROR] RNTO failed: {e}")
+            logger.error("RNTO failed: %s", e)
             self.send_response(session, "550 Failed to rename")
 
+    @requires_auth
     def handle_size(self, session: FTPSession, filename):
         """
         Handle SIZE command - get file size.
         """
-        if not session.is_authenticated:
-            self.send_response(session, "530 Not logged in")
-            return
-        
         try:
             real_path = session.get_real_path(filename)
             size = FileSystemHelper.get_file_size(real_path)
-            self.send_response(session, f"213 {size}")
+            self.send_raw(session, _R_SIZE % size)
             
         except FileNotFoundError:
             self.send_response(session, "550 File not found")
         except IsADirectoryError:
             self.send_response(session, "550 Is a directory")
         except Exception as e:
-            print(f"[ERROR] SIZE failed: {e}")
+            logger.error("SIZE failed: %s", e)
             self.send_response(session, "550 Failed to get file size")
 
+    @requires_auth
     def handle_mdtm(self, session: FTPSession, filename):
         """
         Handle MDTM command - get modification time.
         """
-        if not session.is_authenticated:
-            self.send_response(session, "530 Not logged in")
-            return
-        
         try:
             real_path = session.get_real_path(filename)
             mtime = FileSystemHelper.get_modification_time(real_path)
@@ -538,5 +955,5 @@ class FTPServer:
         except FileNotFoundError:
             self.send_response(session, "550 File not found")
         except Exception as e:
-            print(f"[ERROR] MDTM failed: {e}")
+            logger.error("MDTM failed: %s", e)
             self.send_response(session, "550 Failed to get modification time")
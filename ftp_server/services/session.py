@@ -1,5 +1,14 @@
 import os
-import datetime
+import time
+import socket
+from contextlib import contextmanager
+
+
+# How many resolved paths a session remembers
+MAX_RESOLVED = 256
+
+# Linux calls it TCP_CORK, BSD/macOS TCP_NOPUSH; None where neither exists
+_TCP_CORK = getattr(socket, "TCP_CORK", None) or getattr(socket, "TCP_NOPUSH", None)
 
 
 class FTPSession:
@@ -22,6 +31,14 @@ class FTPSession:
         # Root directory for FTP server (sandbox)
         self.root_dir = os.path.abspath(root_dir)
 
+        # Root with a trailing separator, for the traversal check in
+        # get_real_path() - "/srv/ftp" must not match "/srv/ftp-other"
+        self.root_prefix = os.path.join(self.root_dir, "")
+
+        # Same again with symlinks resolved, for the symlink check
+        self.root_real = os.path.realpath(self.root_dir)
+        self.root_real_prefix = os.path.join(self.root_real, "")
+
         # Current working directory (relative to root)
         self.current_dir = "/"
 
@@ -29,6 +46,24 @@ class FTPSession:
         self.is_authenticated = False
         self.username = None
 
+        # Bytes received after the last complete command line (pipelining)
+        self.command_buffer = bytearray()
+
+        # How much of command_buffer is known not to contain a newline
+        self.command_scanned = 0
+
+        # Replies the client hasn't taken yet (non-blocking control socket)
+        self.send_buffer = bytearray()
+
+        # Fixed buffer the control socket is read into - allocated once per
+        # session instead of a new bytes object for every recv()
+        self.recv_buffer = bytearray(4096)
+        self.recv_view = memoryview(self.recv_buffer)
+
+        # Buffered reader for the blocking handle_client() loop
+        # (created on first use - the selector loop doesn't need it)
+        self.rfile = None
+
         # Transfer type: "A" (ASCII) or "I" (Binary)
         self.transfer_type = "A"
 
@@ -36,8 +71,20 @@ class FTPSession:
         self.passive_server_socket = None
         self.passive_port = None
 
-        # Session metadata
-        self.connected_at = datetime.datetime.now()
+        # PassiveModeManager from the last PASV/EPSV (None until then)
+        self.passive_manager = None
+
+        # Source path from RNFR, waiting for RNTO
+        self.rename_from = None
+
+        # path -> real path, for the current directory only (cleared by
+        # set_current_dir()); clients keep coming back to the same few
+        # paths, so most lookups skip the string work in _resolve()
+        self._resolved = {}
+
+        # Session metadata - monotonic, for measuring how long the session
+        # has been up (turn into a wall-clock time only when displaying it)
+        self.connected_at_ns = time.monotonic_ns()
 
     def get_real_path(self, path=None):
         """
@@ -49,12 +96,40 @@ class FTPSession:
         if path is None:
             path = self.current_dir
 
+        real_path = self._resolved.get(path)
+
+        if real_path is None:
+            real_path = self._resolve(self.current_dir, path)
+
+            # Bounded: a client can send any number of distinct names
+            if len(self._resolved) >= MAX_RESOLVED:
+                self._resolved.clear()
+
+            self._resolved[path] = real_path
+
+        # A symlink inside the root can still point outside it - check where
+        # the path really ends up, not just how it is spelled. Done on every
+        # call, outside the cache: the link may have been swapped in since
+        resolved = os.path.realpath(real_path)
+
+        if resolved != self.root_real and not resolved.startswith(self.root_real_prefix):
+            raise PermissionError("Access denied: Path traversal attempt detected")
+
+        return real_path
+
+    def _resolve(self, current_dir, path):
+        """
+        String part of get_real_path(), resolving path against current_dir.
+
+        Touches only strings, never the filesystem, so the result can be
+        cached until the current directory changes.
+        """
         # If client gives relative path, make it relative to current_dir
         if not path.startswith("/"):
-            if self.current_dir.endswith("/"):
-                path = self.current_dir + path
+            if current_dir.endswith("/"):
+                path = current_dir + path
             else:
-                path = self.current_dir + "/" + path
+                path = current_dir + "/" + path
 
         # Normalize path
         normalized = os.path.normpath(path).replace("\\", "/")
@@ -67,7 +142,7 @@ class FTPSession:
         real_path = os.path.abspath(os.path.join(self.root_dir, normalized.lstrip("/")))
 
         # Security check: real_path must remain inside root_dir
-        if not real_path.startswith(self.root_dir):
+        if real_path != self.root_dir and not real_path.startswith(self.root_prefix):
             raise PermissionError("Access denied: Path traversal attempt detected")
 
         return real_path
@@ -84,10 +159,45 @@ class FTPSession:
 
         self.current_dir = normalized
 
+        # Relative paths now resolve somewhere else
+        self._resolved.clear()
+
+    @contextmanager
+    def cork(self):
+        """
+        Hold back partial segments on the control socket until the block ends.
+
+        Replies sent inside the block leave as full segments instead of one
+        small packet each. Does nothing where TCP_CORK/TCP_NOPUSH don't exist.
+        """
+        if _TCP_CORK is None:
+            yield
+            return
+
+        self.client_socket.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, 1)
+
+        try:
+            yield
+        finally:
+            # The session may have been closed inside the block
+            if self.client_socket:
+                try:
+                    self.client_socket.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, 0)
+                except OSError:
+                    pass
+
     def cleanup(self):
         """
         Cleanup session resources.
         """
+        if self.rfile:
+            self.rfile.close()
+            self.rfile = None
+
+        if self.passive_manager:
+            self.passive_manager.close()
+            self.passive_manager = None
+
         try:
             if self.passive_server_socket:
                 self.passive_server_socket.close()
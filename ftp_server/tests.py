@@ -1,3 +1,255 @@
-from django.test import TestCase
+import os
+import shutil
+import socket
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .services import file_system
+from .services.file_system import FileSystemHelper, ListingCache, listing_cache
+from .services.server_core import MAX_CMD_LEN, FTPServer
+from .services.session import FTPSession
+
+
+class RealPathTests(SimpleTestCase):
+    """FTPSession.get_real_path() must never leave the root directory."""
+
+    def setUp(self):
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+
+        self.root = os.path.join(base, "root")
+        self.outside = os.path.join(base, "outside")
+        os.mkdir(self.root)
+        os.mkdir(self.outside)
+
+        self.session = FTPSession(None, None, self.root)
+
+    def test_paths_inside_root(self):
+        self.assertEqual(self.session.get_real_path("/"), self.session.root_dir)
+        self.assertEqual(
+            self.session.get_real_path("pub/file.txt"),
+            os.path.join(self.session.root_dir, "pub", "file.txt"),
+        )
+
+    def test_dotdot_is_clamped_to_root(self):
+        # "/.." is "/" - the client can climb no higher than the root
+        self.assertEqual(self.session.get_real_path("../../etc/passwd"),
+                         os.path.join(self.session.root_dir, "etc", "passwd"))
+
+        self.session.set_current_dir("/pub")
+        self.assertEqual(self.session.get_real_path("../.."), self.session.root_dir)
+
+    def test_sibling_with_root_as_prefix(self):
+        # "<root>-evil" starts with "<root>" but is not inside it
+        os.mkdir(self.root + "-evil")
+        os.symlink(self.root + "-evil", os.path.join(self.root, "evil"))
+
+        with self.assertRaises(PermissionError):
+            self.session.get_real_path("evil")
+
+    def test_symlink_out_of_root(self):
+        os.symlink(self.outside, os.path.join(self.root, "escape"))
+
+        with self.assertRaises(PermissionError):
+            self.session.get_real_path("escape/secret.txt")
+
+    def test_symlink_swapped_in_after_resolve(self):
+        name = os.path.join(self.root, "file.txt")
+        open(name, "w").close()
+
+        # First lookup is fine (and cached)
+        self.assertEqual(self.session.get_real_path("file.txt"), name)
+
+        # Replace the file with a link pointing outside the root
+        os.remove(name)
+        os.symlink(os.path.join(self.outside, "secret.txt"), name)
+
+        with self.assertRaises(PermissionError):
+            self.session.get_real_path("file.txt")
+
+
+class ListingCacheTests(SimpleTestCase):
+    """ListingCache: mtime check, TTL and LRU eviction."""
+
+    def test_hit_while_unchanged(self):
+        cache = ListingCache()
+        cache.put("/d", 1, b"listing")
+
+        self.assertEqual(cache.get("/d", 1), b"listing")
+
+    def test_changed_mtime_is_a_miss(self):
+        cache = ListingCache()
+        cache.put("/d", 1, b"listing")
+
+        self.assertIsNone(cache.get("/d", 2))
+
+        # The stale entry is gone, even for the old mtime
+        self.assertIsNone(cache.get("/d", 1))
+
+    def test_ttl_expiry(self):
+        cache = ListingCache(ttl=2.0)
+
+        with mock.patch.object(file_system.time, "monotonic", return_value=100.0):
+            cache.put("/d", 1, b"listing")
+
+        with mock.patch.object(file_system.time, "monotonic", return_value=101.0):
+            self.assertEqual(cache.get("/d", 1), b"listing")
+
+        with mock.patch.object(file_system.time, "monotonic", return_value=102.5):
+            self.assertIsNone(cache.get("/d", 1))
+
+    def test_lru_eviction(self):
+        cache = ListingCache(maxsize=2)
+        cache.put("/a", 1, b"a")
+        cache.put("/b", 1, b"b")
+
+        # Touch /a, so /b is now the least recently used
+        cache.get("/a", 1)
+        cache.put("/c", 1, b"c")
+
+        self.assertIsNone(cache.get("/b", 1))
+        self.assertEqual(cache.get("/a", 1), b"a")
+        self.assertEqual(cache.get("/c", 1), b"c")
+
+    def test_invalidate(self):
+        cache = ListingCache()
+        cache.put("/d", 1, b"listing")
+        cache.invalidate("/d")
+
+        self.assertIsNone(cache.get("/d", 1))
+
+        # Forgetting an unknown directory is fine
+        cache.invalidate("/nowhere")
+
+
+class ListingInvalidationTests(SimpleTestCase):
+    """FileSystemHelper's write helpers drop the listings they make stale."""
+
+    def setUp(self):
+        self.root = os.path.realpath(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        self.addCleanup(listing_cache.invalidate, self.root)
+
+        self.path = os.path.join(self.root, "a.txt")
+        FileSystemHelper.write_file(self.path, [b"x"])
+
+    def cached(self):
+        return self.root in listing_cache._entries
+
+    def test_listing_is_cached(self):
+        listing = FileSystemHelper.list_directory(self.root)
+
+        self.assertTrue(self.cached())
+        self.assertIs(FileSystemHelper.list_directory(self.root), listing)
+
+    def test_overwrite_shows_new_size(self):
+        # Overwriting a file leaves the directory mtime alone - only the
+        # explicit invalidation keeps the listing right
+        FileSystemHelper.list_directory(self.root)
+        FileSystemHelper.write_file(self.path, [b"hello", b" world"])
+
+        self.assertFalse(self.cached())
+        self.assertIn(b" 11 ", FileSystemHelper.list_directory(self.root))
+
+    def test_delete_invalidates(self):
+        FileSystemHelper.list_directory(self.root)
+        FileSystemHelper.delete_file(self.path)
+
+        self.assertFalse(self.cached())
+        self.assertNotIn(b"a.txt", FileSystemHelper.list_directory(self.root))
+
+    def test_rename_invalidates(self):
+        FileSystemHelper.list_directory(self.root)
+        FileSystemHelper.rename(self.path, os.path.join(self.root, "b.txt"))
+
+        self.assertFalse(self.cached())
+        self.assertIn(b"b.txt", FileSystemHelper.list_directory(self.root))
+
+
+class CommandLengthTests(SimpleTestCase):
+    """Command lines longer than MAX_CMD_LEN are answered with 500 and refused."""
+
+    def setUp(self):
+        self.server = FTPServer()
+
+        server_sock, self.client = socket.socketpair()
+        self.addCleanup(server_sock.close)
+        self.addCleanup(self.client.close)
+        self.client.settimeout(5)
+
+        self.session = FTPSession(server_sock, None, tempfile.gettempdir())
+
+    def reply(self):
+        return self.client.recv(4096)
+
+    def test_buffered_line_arriving_in_pieces(self):
+        self.session.client_socket.setblocking(False)
+
+        self.session.command_buffer += b"NO"
+        self.assertIsNone(self.server.next_command(self.session))
+
+        self.session.command_buffer += b"OP\r\n"
+        self.assertEqual(self.server.next_command(self.session), b"NOOP")
+
+    def test_buffered_line_too_long(self):
+        self.session.client_socket.setblocking(False)
+        self.session.command_buffer += b"A" * (MAX_CMD_LEN + 1)
+
+        with self.assertRaises(ValueError):
+            self.server.next_command(self.session)
+
+        self.assertEqual(self.reply(), b"500 Command line too long\r\n")
+
+    def test_blocking_line(self):
+        self.client.sendall(b"PWD\r\n")
+
+        self.assertEqual(self.server.recv_command(self.session), b"PWD")
+
+    def test_blocking_line_too_long(self):
+        self.client.sendall(b"A" * MAX_CMD_LEN + b"\r\n")
+
+        with self.assertRaises(ValueError):
+            self.server.recv_command(self.session)
+
+        self.assertEqual(self.reply(), b"500 Command line too long\r\n")
+
+
+class ChangeDirectoryTests(SimpleTestCase):
+    """CWD/CDUP answer 550 for every kind of bad path instead of dropping the client."""
+
+    def setUp(self):
+        self.server = FTPServer()
+
+        server_sock, self.client = socket.socketpair()
+        self.addCleanup(server_sock.close)
+        self.addCleanup(self.client.close)
+        self.client.settimeout(5)
+
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+        self.session = FTPSession(server_sock, None, self.root)
+
+    def reply(self):
+        return self.client.recv(4096)
+
+    def test_cwd_into_directory(self):
+        os.mkdir(os.path.join(self.root, "pub"))
+
+        self.server.cmd_cwd(self.session, "pub")
+
+        self.assertEqual(self.reply(), b"250 Directory changed successfully\r\n")
+
+    def test_cwd_missing(self):
+        self.server.cmd_cwd(self.session, "nope")
+
+        self.assertEqual(self.reply(), b"550 Directory not found\r\n")
+
+    def test_cwd_name_too_long(self):
+        # stat() fails with ENAMETOOLONG - not one of the usual errors
+        self.server.cmd_cwd(self.session, "a" * 5000)
+
+        self.assertEqual(self.reply(), b"550 Directory not found\r\n")
+        self.assertEqual(self.session.current_dir, "/")